@@ -1,16 +1,39 @@
+import collections
+import concurrent.futures
+import functools
 import numpy as np
+import matplotlib
+# 只输出图片文件，固定使用非交互的 Agg 后端
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from scipy.fft import fft, fftfreq
+import soundfile as sf
+from scipy.fft import rfft, rfftfreq
+
+# 有 pyFFTW 时使用 FFTW 后端 (计划缓存配置与效果器共用)
+from effects._utils import fft_backend
 
 # 设置绘图风格
 plt.style.use('bmh')
 
+
+@functools.lru_cache(maxsize=8)
+def _hann_window(nfft):
+    """缓存单精度汉宁窗及其能量 (PSD 定标用)"""
+    window = np.hanning(nfft).astype(np.float32)
+    window.setflags(write=False)
+    return window, float(np.sum(window.astype(np.float64) ** 2))
+
+
 class AudioAnalyzer:
     @staticmethod
     def calculate_snr(original, processed):
         """
         计算信噪比 (Signal-to-Noise Ratio)
         """
+        # 同一数组无需计算
+        if original is processed:
+            return float('inf')
+
         # 1. 维度处理 (确保是单声道)
         if len(original.shape) > 1: original = original[0]
         if len(processed.shape) > 1: processed = processed[0]
@@ -22,20 +45,63 @@ class AudioAnalyzer:
 
         # 3. 计算噪声成分
         # 噪声 = 原始信号 - 处理后信号
-        noise = org - proc
+        # 音频源本身是 int16/float32 精度，统一用 float32 计算
+        org32 = org.astype(np.float32, copy=False)
+        noise32 = org32 - proc.astype(np.float32, copy=False)
 
         # 4. 计算功率 (Power)
-        # 转换为 float64 防止溢出
-        p_signal = np.sum(org.astype(np.float64) ** 2)
-        p_noise = np.sum(noise.astype(np.float64) ** 2)
+        # 点积把平方与求和合并为一次遍历，不产生平方临时数组
+        p_signal = float(np.dot(org32, org32))
+        p_noise = float(np.dot(noise32, noise32))
 
         # 5. 防止除以零
         if p_noise < 1e-10:
             return float('inf')  # 无噪声
+        if p_signal == 0:
+            return float('-inf')  # 无信号
 
         snr = 10 * np.log10(p_signal / p_noise)
         return snr
 
+    @staticmethod
+    def compute_spectrogram(y, samplerate, nfft=1024, noverlap=512):
+        """
+        计算单边功率谱密度声纹图 (定标与 matplotlib specgram 默认 PSD 一致)
+        实信号只需正频率部分，直接用 rfft 代替完整复数 FFT
+        """
+        hop = nfft - noverlap
+        # 单精度输入使 FFT 走 float32/complex64 内核
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        if len(y) < nfft:
+            y = np.pad(y, (0, nfft - len(y)))
+
+        # 1. 分帧 (步长视图，不复制数据) + 汉宁窗
+        frames = np.lib.stride_tricks.sliding_window_view(y, nfft)[::hop]
+        window, window_energy = _hann_window(nfft)
+        # 加窗结果是本函数私有的临时数组，允许 FFT 直接覆写
+        windowed = frames * window
+
+        # 2. 实数 FFT：只计算 nfft//2+1 个正频率点，多线程执行
+        with fft_backend():
+            spec = rfft(windowed, axis=-1, workers=-1, overwrite_x=True)
+        freqs = rfftfreq(nfft, 1 / samplerate)
+
+        # 3. 功率谱密度定标：单边谱除直流和奈奎斯特点外能量乘2
+        pxx = (spec.real ** 2 + spec.imag ** 2) / (samplerate * window_energy)
+        pxx[:, 1:(nfft + 1) // 2] *= 2
+
+        times = (np.arange(len(frames)) * hop + nfft / 2) / samplerate
+        return pxx.T, freqs, times
+
+    @staticmethod
+    def _zoom_range(length, samplerate, window_ms):
+        """波形细节图的截取区间：信号中部的一小段"""
+        window_samples = int((window_ms / 1000) * samplerate)
+        mid_point = length // 2
+        start = max(0, mid_point - window_samples // 2)
+        end = min(length, mid_point + window_samples // 2)
+        return start, end
+
     @staticmethod
     def plot_comparison(original, processed, samplerate, title="Analysis", filename="analysis.png"):
         """
@@ -52,6 +118,68 @@ class AudioAnalyzer:
         org = original[:min_len]
         proc = processed[:min_len]
 
+        nfft, noverlap = 1024, 512
+        Pxx, freqs, bins = AudioAnalyzer.compute_spectrogram(proc, samplerate, nfft=nfft, noverlap=noverlap)
+
+        # 截取中间的一小段 (50ms)
+        window_ms = 50
+        start, end = AudioAnalyzer._zoom_range(min_len, samplerate, window_ms)
+
+        AudioAnalyzer._render(Pxx, freqs, bins, org[start:end], proc[start:end], samplerate,
+                              nfft, noverlap, window_ms, title, filename)
+
+    @classmethod
+    def plot_comparison_from_files(cls, original_path, processed_path, title="Analysis",
+                                   filename="analysis.png", block_frames=64):
+        """
+        与 plot_comparison 相同的分析图，但直接从音频文件读取 (只取第一声道)
+        - 声纹图：分块流式读取处理后文件，每块含 block_frames 个 FFT 帧
+        - 波形细节：定位到中部直接读取 50ms，不加载整段文件
+        """
+        nfft, noverlap = 1024, 512
+        hop = nfft - noverlap
+        window_ms = 50
+
+        with sf.SoundFile(original_path) as f_org, sf.SoundFile(processed_path) as f_proc:
+            samplerate = f_proc.samplerate
+            min_len = min(f_org.frames, f_proc.frames)
+
+            # 1. 声纹图：相邻块重叠 noverlap 个采样，保证帧位置与整段计算一致
+            #    读取下一块的同时在后台线程计算上一块的 FFT (两者都会释放 GIL)
+            #    在途任务数有上限，避免读取过快时整段文件堆积在内存中
+            columns = []
+            pending = collections.deque()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+                for i, block in enumerate(f_proc.blocks(blocksize=block_frames * hop + noverlap,
+                                                        overlap=noverlap, frames=min_len,
+                                                        dtype='float32', always_2d=True)):
+                    # 尾部不足一帧的残块已被上一块覆盖
+                    if len(block) < nfft and i > 0:
+                        break
+                    pending.append(ex.submit(cls.compute_spectrogram, block[:, 0], samplerate,
+                                             nfft=nfft, noverlap=noverlap))
+                    if len(pending) > 2:
+                        columns.append(pending.popleft().result()[0])
+                while pending:
+                    columns.append(pending.popleft().result()[0])
+            Pxx = np.concatenate(columns, axis=1)
+            freqs = rfftfreq(nfft, 1 / samplerate)
+            bins = (np.arange(Pxx.shape[1]) * hop + nfft / 2) / samplerate
+
+            # 2. 波形细节：只读取中部窗口
+            start, end = cls._zoom_range(min_len, samplerate, window_ms)
+            f_org.seek(start)
+            org_window = f_org.read(end - start, dtype='float32', always_2d=True)[:, 0]
+            f_proc.seek(start)
+            proc_window = f_proc.read(end - start, dtype='float32', always_2d=True)[:, 0]
+
+        cls._render(Pxx, freqs, bins, org_window, proc_window, samplerate,
+                    nfft, noverlap, window_ms, title, filename)
+
+    @staticmethod
+    def _render(Pxx, freqs, bins, org_window, proc_window, samplerate,
+                nfft, noverlap, window_ms, title, filename):
+        """根据声纹图数据与波形窗口绘图并保存"""
         # 创建画布
         fig, axes = plt.subplots(2, 1, figsize=(12, 10))
 
@@ -59,12 +187,24 @@ class AudioAnalyzer:
         ax1.set_title(f"Spectrogram Analysis: {title}", fontsize=12, fontweight='bold')
 
         # 绘制声纹图
-        Pxx, freqs, bins, im = ax1.specgram(
-            proc,
-            NFFT=1024,
-            Fs=samplerate,
-            noverlap=512,
-            cmap='inferno'
+        pad_xextent = (nfft - noverlap) / samplerate / 2
+        extent = (bins[0] - pad_xextent, bins[-1] + pad_xextent, freqs[0], freqs[-1])
+
+        # 长音频的帧数远超图像像素，沿时间轴做峰值保持的最大池化，最多保留 4096 列
+        max_cols = 4096
+        if Pxx.shape[1] > max_cols:
+            factor = -(-Pxx.shape[1] // max_cols)
+            pad = (-Pxx.shape[1]) % factor
+            Pxx = np.pad(Pxx, ((0, 0), (0, pad)))
+            Pxx = Pxx.reshape(Pxx.shape[0], -1, factor).max(axis=2)
+
+        im = ax1.imshow(
+            10 * np.log10(Pxx),
+            origin='lower',
+            aspect='auto',
+            cmap='inferno',
+            extent=extent,
+            rasterized=True
         )
 
         ax1.set_ylabel("Frequency (Hz)")
@@ -76,24 +216,17 @@ class AudioAnalyzer:
 
         ax2 = axes[1]
 
-        # 截取中间的一小段 (50ms)
-        window_ms = 50
-        window_samples = int((window_ms / 1000) * samplerate)
-
-        mid_point = len(proc) // 2
-        start = max(0, mid_point - window_samples // 2)
-        end = min(len(proc), mid_point + window_samples // 2)
-
         # 生成时间轴
-        time_axis = np.linspace(0, (end - start) / samplerate * 1000, end - start)
+        num_samples = len(proc_window)
+        time_axis = np.linspace(0, num_samples / samplerate * 1000, num_samples)
 
         ax2.set_title(f"Waveform Detail ({window_ms}ms Zoom-in)")
 
         # 原始信号 (虚线)
-        ax2.plot(time_axis, org[start:end], color='gray', linestyle='--', alpha=0.6, label='Original Input',
+        ax2.plot(time_axis, org_window, color='gray', linestyle='--', alpha=0.6, label='Original Input',
                  linewidth=1)
         # 处理后信号 (实线)
-        ax2.plot(time_axis, proc[start:end], color='#007acc', alpha=0.9, label='Processed Output', linewidth=1.5)
+        ax2.plot(time_axis, proc_window, color='#007acc', alpha=0.9, label='Processed Output', linewidth=1.5)
 
         ax2.set_xlabel("Time (ms)")
         ax2.set_ylabel("Amplitude")
@@ -105,7 +238,7 @@ class AudioAnalyzer:
         # 保存
         plt.tight_layout()
         try:
-            plt.savefig(filename, dpi=150)
+            plt.savefig(filename, dpi=100)
             print(f"分析图表已保存至: {filename}")
         except Exception as e:
             print(f"保存图表失败: {e}")
@@ -1,7 +1,10 @@
 import os
+import hashlib
+import mmap
 from pathlib import Path
+import numpy as np
+import soundfile as sf
 from pydub import AudioSegment
-import time
 
 class AudioHandler:
     def __init__(self, temp_dir="temp_audio"):
@@ -10,11 +13,20 @@ class AudioHandler:
         """
         self.temp_dir = Path(temp_dir)
         self._ensure_dir()
+        # 进程内缓存 {(绝对路径, 修改时间, 大小): WAV 路径}，重复调用免去再次哈希
+        self._wav_cache = {}
 
     def _ensure_dir(self):
         """确保临时目录存在"""
-        if not self.temp_dir.exists():
-            self.temp_dir.mkdir(parents=True)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def _file_digest(self, path):
+        """计算文件内容的 SHA-256 摘要 (mmap 映射，单次读取)"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return hashlib.sha256().hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
 
     def convert_mp3_to_wav(self, input_path):
         """
@@ -29,26 +41,61 @@ class AudioHandler:
         if input_path.suffix.lower() != '.mp3':
             print(f"警告: 输入文件 {input_path.name} 可能不是 MP3，尝试强制读取...")
 
+        stat = input_path.stat()
+        cache_key = (str(input_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        cached = self._wav_cache.get(cache_key)
+        if cached is not None and os.path.exists(cached):
+            print(f"命中缓存: {cached}")
+            return cached
+
         print(f"正在处理: {input_path.name} ...")
 
         try:
-            # 2. 使用 pydub 加载音频
-            audio = AudioSegment.from_mp3(str(input_path))
-            
-            # 3. 准备输出路径
-            timestamp = int(time.time())
-            output_filename = f"{input_path.stem}_{timestamp}.wav"
+            # 2. 准备输出路径：按内容哈希命名，相同输入直接复用已转换的 WAV
+            digest = self._file_digest(input_path)[:16]
+            output_filename = f"{input_path.stem}_{digest}.wav"
             output_path = self.temp_dir / output_filename
 
-            # 4. 导出为 WAV
-            audio.export(str(output_path), format="wav")
-            
-            print(f"转换成功: {output_path}")
-            return str(output_path.absolute())
+            if output_path.exists():
+                print(f"命中缓存: {output_path}")
+            else:
+                # 3. 使用 pydub 加载音频
+                audio = AudioSegment.from_mp3(str(input_path))
+
+                # 4. 导出为 WAV (先写临时文件再改名，避免留下半成品被当作缓存)
+                tmp_path = output_path.with_suffix(".wav.part")
+                audio.export(str(tmp_path), format="wav")
+                os.replace(tmp_path, output_path)
+
+                print(f"转换成功: {output_path}")
+
+            result = str(output_path.absolute())
+            self._wav_cache[cache_key] = result
+            return result
 
         except Exception as e:
             raise RuntimeError(f"音频转换失败: {str(e)}")
 
+    def load_mp3(self, input_path):
+        """
+        直接将 MP3 解码为 float32 数组，不再落盘 WAV
+        返回 (audio, samplerate)，audio 形状为 (通道数, 采样点数)，与 AudioFile.read 一致
+        """
+        input_path = Path(input_path)
+
+        if not input_path.exists():
+            raise FileNotFoundError(f"找不到文件: {input_path}")
+
+        print(f"正在解码: {input_path.name} ...")
+
+        try:
+            # libsndfile >= 1.1 原生支持 MP3，解码结果直接进入内存
+            data, samplerate = sf.read(str(input_path), dtype='float32', always_2d=True)
+        except Exception as e:
+            raise RuntimeError(f"音频解码失败: {str(e)}")
+
+        return np.ascontiguousarray(data.T), samplerate
+
 # 用于测试
 if __name__ == "__main__":
     converter = AudioHandler()
@@ -0,0 +1,92 @@
+import numpy as np
+from ._utils import NUMBA_AVAILABLE, njit, prange
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _parity7(x):
+        """7位整数的奇偶校验"""
+        x ^= x >> 4
+        x ^= x >> 2
+        x ^= x >> 1
+        return x & 1
+
+    @njit(cache=True)
+    def _roundtrip_group(d1, d2, d3, d4, flips):
+        """
+        单个4位分组的 编码 → 信道误码 → 伴随式纠错，返回纠错后的数据位 (d1 在最高位的4位整数)
+        码字以7位整数表示 (第k位对应码字第k+1位)，flips 为该码字的误码翻转掩码，无临时数组
+        """
+        # 1. 编码：[p1, p2, d1, p3, d2, d3, d4]
+        p1 = d1 ^ d2 ^ d4
+        p2 = d1 ^ d3 ^ d4
+        p3 = d2 ^ d3 ^ d4
+        word = p1 | (p2 << 1) | (d1 << 2) | (p3 << 3) | (d2 << 4) | (d3 << 5) | (d4 << 6)
+
+        # 2. 信道误码
+        word ^= flips
+
+        # 3. 伴随式 (s1: 位1,3,5,7  s2: 位2,3,6,7  s3: 位4,5,6,7)
+        s1 = _parity7(word & 0x55)
+        s2 = _parity7(word & 0x66)
+        s3 = _parity7(word & 0x78)
+        error_pos = s3 * 4 + s2 * 2 + s1
+        if error_pos != 0:
+            word ^= 1 << (error_pos - 1)
+
+        # 4. 取数据位
+        return (((word >> 2) & 1) << 3) | (((word >> 4) & 1) << 2) | (((word >> 5) & 1) << 1) | ((word >> 6) & 1)
+
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def encode_decode_packed(data, out, flips):
+        """
+        汉明码(7,4) 融合内核 (紧凑比特)：每字节8位 (高位在前) 即两个4位分组
+        分组序号：高半字节为 2j，低半字节为 2j+1，flips[分组序号] 为对应码字的误码翻转掩码
+        """
+        n = data.shape[0]
+        for j in prange(n):
+            b = np.int64(data[j])
+            hi = _roundtrip_group((b >> 7) & 1, (b >> 6) & 1, (b >> 5) & 1, (b >> 4) & 1,
+                                  np.int64(flips[2 * j]))
+            lo = _roundtrip_group((b >> 3) & 1, (b >> 2) & 1, (b >> 1) & 1, b & 1,
+                                  np.int64(flips[2 * j + 1]))
+            out[j] = (hi << 4) | lo
+
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def encode(bits4, out7):
+        """汉明码(7,4) 并行编码：(N, 4) 数据位 → (N, 7) 码字 [p1, p2, d1, p3, d2, d3, d4]"""
+        n = bits4.shape[0]
+        for i in prange(n):
+            d1 = bits4[i, 0]
+            d2 = bits4[i, 1]
+            d3 = bits4[i, 2]
+            d4 = bits4[i, 3]
+            out7[i, 0] = d1 ^ d2 ^ d4
+            out7[i, 1] = d1 ^ d3 ^ d4
+            out7[i, 2] = d1
+            out7[i, 3] = d2 ^ d3 ^ d4
+            out7[i, 4] = d2
+            out7[i, 5] = d3
+            out7[i, 6] = d4
+
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def decode(bits7, out4):
+        """汉明码(7,4) 并行解码：(N, 7) 码字 → 伴随式纠错 → (N, 4) 数据位，伴随式/纠错/输出在同一循环内完成"""
+        n = bits7.shape[0]
+        for i in prange(n):
+            word = np.int64(0)
+            for k in range(7):
+                word |= np.int64(bits7[i, k] & 1) << k
+
+            s1 = _parity7(word & 0x55)
+            s2 = _parity7(word & 0x66)
+            s3 = _parity7(word & 0x78)
+            error_pos = s3 * 4 + s2 * 2 + s1
+            if error_pos != 0:
+                word ^= 1 << (error_pos - 1)
+
+            out4[i, 0] = (word >> 2) & 1
+            out4[i, 1] = (word >> 4) & 1
+            out4[i, 2] = (word >> 5) & 1
+            out4[i, 3] = (word >> 6) & 1
@@ -0,0 +1,105 @@
+import contextlib
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.fft
+
+# numba 可选依赖统一在此导入，各模块从这里取 njit / prange / NUMBA_AVAILABLE
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = prange = None
+    NUMBA_AVAILABLE = False
+
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft as _fftw_backend
+    # 缓存 FFTW 计划，相同形状的重复变换免去规划开销 (全进程统一配置)
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(30)
+    PYFFTW_AVAILABLE = True
+except ImportError:
+    PYFFTW_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, cache=True)
+    def _peak_kernel(x):
+        """单次遍历求 max|x|，不生成 |x| 临时数组"""
+        m = 0.0
+        for i in prange(x.size):
+            m = max(m, abs(x[i]))
+        return m
+
+
+def peak_amplitude(x):
+    """
+    峰值幅度 max|x|，返回与输入同精度的标量 (空数组返回 0)
+    归一化时配合倒数使用：x * (1.0 / peak_amplitude(x))，以一次乘法代替逐采样除法
+    """
+    x = np.asarray(x)
+    dtype = x.dtype if x.dtype.kind == 'f' else np.dtype(np.float64)
+    if x.size == 0:
+        return dtype.type(0)
+    if NUMBA_AVAILABLE and x.dtype.kind == 'f':
+        return dtype.type(_peak_kernel(x.ravel()))
+    # 无 numba 时用 max/min 两次归约代替 abs 临时数组
+    return dtype.type(max(x.max(), -x.min()))
+
+
+def fft_backend():
+    """
+    scipy.fft 后端上下文：安装了 pyFFTW 时切换到 FFTW 后端，否则保持默认 (pocketfft)
+    用法：with fft_backend(): spec = rfft(...)
+    """
+    if PYFFTW_AVAILABLE:
+        return scipy.fft.set_backend(_fftw_backend)
+    return contextlib.nullcontext()
+
+
+@functools.lru_cache(maxsize=64)
+def butter_sos(order, cutoff, btype, fs):
+    """
+    巴特沃斯滤波器的二阶节系数 (float32)，按参数缓存，调用方不得修改返回的数组
+    同一采样率下反复处理时不再重复设计滤波器；带通/带阻的 cutoff 以元组传入
+    (sosfilt 要求系数数组可写，因此不设为只读)
+    """
+    # scipy.signal 导入开销较大 (数百毫秒)，只在首次设计滤波器时导入
+    from scipy.signal import butter
+    return butter(order, cutoff, btype=btype, fs=fs, output='sos').astype(np.float32)
+
+
+def sosfilt_channels(sos, x):
+    """
+    沿最后一维对 (C, N) 多声道音频做 sosfilt，各声道在线程池中并行执行
+    scipy 的二阶节递推在 C 代码中释放 GIL，声道间互不依赖；单声道或单核时直接整体调用
+    """
+    from scipy.signal import sosfilt
+    workers = min(x.shape[0], os.cpu_count() or 1) if x.ndim == 2 else 1
+    if workers <= 1:
+        return sosfilt(sos, x, axis=-1)
+
+    out = np.empty(x.shape, dtype=np.result_type(sos, x))
+
+    def filter_channel(i):
+        out[i] = sosfilt(sos, x[i])
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        # list() 取回结果，使工作线程中的异常在此处抛出
+        list(ex.map(filter_channel, range(x.shape[0])))
+    return out
+
+
+def channel_peaks(x):
+    """
+    (C, N) 多声道音频逐声道的峰值幅度，形状 (C, 1)，可直接按声道广播
+    """
+    x = np.asarray(x)
+    dtype = x.dtype if x.dtype.kind == 'f' else np.dtype(np.float64)
+    peaks = np.empty((x.shape[0], 1), dtype=dtype)
+    for i, row in enumerate(x):
+        peaks[i, 0] = peak_amplitude(row)
+    return peaks
@@ -12,6 +12,13 @@ class AliasingStyle(AudioEffect):
         self.target_sr = target_samplerate
         self.obey_nyquist = obey_nyquist
 
+        # 抗混叠/重建低通滤波器只取决于目标采样率，构造一次反复使用
+        # 截止频率留一点余量 (*0.9)
+        self._lowpass = None
+        if obey_nyquist:
+            nyquist_freq = target_samplerate / 2
+            self._lowpass = Pedalboard([LowpassFilter(cutoff_frequency_hz=nyquist_freq * 0.9)])
+
     def process(self, audio, samplerate):
         if self.target_sr >= samplerate:
             return audio
@@ -19,10 +26,7 @@ class AliasingStyle(AudioEffect):
         # 1. 抗混叠滤波 - 输入端
         audio_to_process = audio
         if self.obey_nyquist:
-            nyquist_freq = self.target_sr / 2
-            # 留一点余量 (*0.9)
-            board = Pedalboard([LowpassFilter(cutoff_frequency_hz=nyquist_freq * 0.9)])
-            audio_to_process = board(audio, samplerate)
+            audio_to_process = self._lowpass(audio, samplerate)
 
         # 2. 降采样 - 模拟 ADC
         step = int(samplerate / self.target_sr)
@@ -30,23 +34,19 @@ class AliasingStyle(AudioEffect):
         downsampled = audio_to_process[..., ::step]
 
         # 3. 零阶保持插值 - 模拟 DAC
-        audio_restored = np.repeat(downsampled, step, axis=-1)
-
-        # 对齐
+        # 直接按原长度分配输出，把每个采样广播写入长度为 step 的保持段，无需 repeat 后再裁剪
         original_length = audio.shape[-1]
-        current_length = audio_restored.shape[-1]
-        if current_length > original_length:
-            audio_restored = audio_restored[..., :original_length]
-        elif current_length < original_length:
-            padding = original_length - current_length
-            pad_width = [(0, 0)] * (audio.ndim - 1) + [(0, padding)]
-            audio_restored = np.pad(audio_restored, pad_width, mode='edge')
+        audio_restored = np.empty_like(audio_to_process)
+        full_len = (original_length // step) * step
+        held = audio_restored[..., :full_len].reshape(*audio.shape[:-1], -1, step)
+        held[...] = downsampled[..., :held.shape[-2], None]
+        # 尾部不足一个保持段的部分沿用下一个采样值
+        if full_len < original_length:
+            audio_restored[..., full_len:] = downsampled[..., -1:]
 
         # 4. 重建滤波 - 输出端
         if self.obey_nyquist:
-            nyquist_freq = self.target_sr / 2
             # 再次滤波
-            board_recon = Pedalboard([LowpassFilter(cutoff_frequency_hz=nyquist_freq * 0.9)])
-            audio_restored = board_recon(audio_restored, samplerate)
+            audio_restored = self._lowpass(audio_restored, samplerate)
 
         return audio_restored
\ No newline at end of file
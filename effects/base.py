@@ -2,9 +2,25 @@ from abc import ABC, abstractmethod
 
 class AudioEffect(ABC):
     """Effect Interface"""
+    __slots__ = ('name',)
+
+    # 处理结果是否与分块调用一致 (无全局统计量、插件状态可跨块保留)，可用于流式处理
+    is_streamable = False
+
     def __init__(self, name="Unknown Effect"):
         self.name = name
 
     @abstractmethod
     def process(self, audio, samplerate):
         pass
+
+    def plugins(self):
+        """
+        可与相邻效果合并的 Pedalboard 插件列表，返回 None 表示不可合并
+        合并执行时先运行插件链，再调用 finish 完成插件之外的处理
+        """
+        return None
+
+    def finish(self, audio, samplerate):
+        """插件链之后的非插件处理 (如叠加噪声)，默认不做处理"""
+        return audio
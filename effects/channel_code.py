@@ -1,8 +1,108 @@
+import logging
+import zlib
 import numpy as np
 from .base import AudioEffect
+from ._utils import NUMBA_AVAILABLE
+
+if NUMBA_AVAILABLE:
+    from ._hamming_kernels import encode, decode, encode_decode_packed
+
+logger = logging.getLogger(__name__)
+
+# 字节内位序翻转表：高位在前的紧凑比特 → zlib 所需的低位在前字节
+_BIT_REVERSE = np.packbits(np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1),
+                           axis=1, bitorder='little').ravel()
+
+
+def _sparse_flip_positions(rng, n, error_rate):
+    """
+    长度为 n 的比特流中按误码率独立翻转的比特位置
+    误码率很低时翻转极少：先按二项分布抽取翻转个数，再不放回地抽取位置，
+    随机数开销与翻转个数成正比，而不是与比特数成正比
+    """
+    if error_rate <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    k = rng.binomial(n, error_rate)
+    return rng.choice(n, size=k, replace=False)
+
+
+def _audio_to_packed(audio):
+    """
+    音频转紧凑比特流：限幅后量化为大端 int16，其字节即每字节8位、高位在前的比特流
+    (形状 (..., 2*采样点数))；float32 输入按 [-1, 1] 满幅缩放，其他类型视为整数采样值
+    """
+    if audio.dtype == np.float32:
+        audio = np.clip(audio, -1.0, 1.0).astype(np.float32)
+        # 转换为int16范围
+        audio_int = np.clip(audio * 32767, -32768, 32767).astype('>i2')
+    else:
+        audio_int = np.clip(audio, -32768, 32767).astype('>i2')
+
+    return audio_int.view(np.uint8)
+
+
+def _packed_to_audio(packed):
+    """紧凑比特流转音频 (float32)"""
+    return packed.view('>i2').astype(np.float32) / 32768.0
+
+
+# 伴随式 → 翻转掩码 (第0行全零，表示无错)
+_FLIP_TABLE = np.eye(8, 7, k=-1, dtype=np.uint8)
+
+
+def _hamming_encode_batch(bits):
+    """汉明码(7,4)批量编码：整列异或求校验位，码字顺序为 [p1, p2, d1, p3, d2, d3, d4]"""
+    bits4 = np.ascontiguousarray(bits.reshape(-1, 4), dtype=np.uint8)
+    coded = np.empty((len(bits4), 7), dtype=np.uint8)
+    if NUMBA_AVAILABLE:
+        encode(bits4, coded)
+        return coded.ravel()
+
+    d1, d2, d3, d4 = bits4.T
+    coded[:, 0] = d1 ^ d2 ^ d4
+    coded[:, 1] = d1 ^ d3 ^ d4
+    coded[:, 2] = d1
+    coded[:, 3] = d2 ^ d3 ^ d4
+    coded[:, 4] = d2
+    coded[:, 5] = d3
+    coded[:, 6] = d4
+    return coded.ravel()
+
+
+def _hamming_decode_batch(coded_bits):
+    """汉明码(7,4)批量解码+纠错：整列异或求伴随式，查表翻转错误位"""
+    groups = np.ascontiguousarray(coded_bits.reshape(-1, 7), dtype=np.uint8)
+    if NUMBA_AVAILABLE:
+        decoded = np.empty((len(groups), 4), dtype=np.uint8)
+        decode(groups, decoded)
+        return decoded.ravel()
+
+    g = groups.T
+    s1 = g[0] ^ g[2] ^ g[4] ^ g[6]
+    s2 = g[1] ^ g[2] ^ g[5] ^ g[6]
+    s3 = g[3] ^ g[4] ^ g[5] ^ g[6]
+    error_pos = (s3 << 2) | (s2 << 1) | s1
+    corrected = groups ^ _FLIP_TABLE[error_pos]
+    return corrected[:, [2, 4, 5, 6]].ravel()
+
+
+def _bits_to_audio(bits):
+    """比特流转音频 (float32)，比特数不足16的倍数时末尾补零"""
+    # 确保比特数是16的倍数
+    if len(bits) % 16 != 0:
+        pad_len = 16 - (len(bits) % 16)
+        bits = np.pad(bits, (0, pad_len), 'constant')
+
+    # 每16位打包为一个大端 int16，有符号视图自动处理符号位
+    audio_int = np.packbits(bits.astype(np.uint8)).view('>i2')
+
+    # 转换为float32
+    audio_float = audio_int.astype(np.float32) / 32768.0
+    return np.clip(audio_float, -1.0, 1.0).astype(np.float32)
 
 class HammingCodeEffect(AudioEffect):
     """基于汉明码(7,4)的信道编码音频处理器"""
+    __slots__ = ('error_rate', 'bit_depth', '_int16_min', '_int16_max', '_rng')
 
     def __init__(self):
         super().__init__(name="Hamming Code Effect")
@@ -10,171 +110,80 @@ class HammingCodeEffect(AudioEffect):
         self.bit_depth = 16
         self._int16_min = -32768
         self._int16_max = 32767
-        self._chunk_size = 1000
-
-    def _hamming_7_4_encode(self, data_bits):
-        """汉明码(7,4)编码"""
-        if len(data_bits) != 4:
-            raise ValueError("汉明码(7,4)仅支持4位数据位输入")
-        d1, d2, d3, d4 = data_bits
-
-        p1 = d1 ^ d2 ^ d4
-        p2 = d1 ^ d3 ^ d4
-        p3 = d2 ^ d3 ^ d4
-
-        return [p1, p2, d1, p3, d2, d3, d4]
-
-    def _hamming_7_4_decode(self, coded_bits):
-        """汉明码(7,4)解码+纠错"""
-        if len(coded_bits) != 7:
-            raise ValueError("汉明码(7,4)仅支持7位编码位输入")
-
-        # 创建副本以避免修改原数据
-        bits = coded_bits.copy()
-        p1, p2, d1, p3, d2, d3, d4 = bits
-
-        s1 = p1 ^ d1 ^ d2 ^ d4
-        s2 = p2 ^ d1 ^ d3 ^ d4
-        s3 = p3 ^ d2 ^ d3 ^ d4
-
-        error_pos = s3 * 4 + s2 * 2 + s1 * 1
-        if error_pos != 0 and error_pos <= 7:
-            bits[error_pos - 1] = 1 - bits[error_pos - 1]
-            # 重新赋值
-            p1, p2, d1, p3, d2, d3, d4 = bits
-
-        return [d1, d2, d3, d4]
+        self._rng = np.random.default_rng()
 
     def _audio2bits_safe(self, audio):
-        """音频转比特流 - 安全版本"""
-        # 确保输入在有效范围内
-        if audio.dtype == np.float32:
-            audio = np.clip(audio, -1.0, 1.0).astype(np.float32)
-            # 转换为int16范围
-            audio_int = np.clip(audio * 32767, self._int16_min, self._int16_max).astype(np.int32)
-        else:
-            audio_int = np.clip(audio, self._int16_min, self._int16_max).astype(np.int32)
-
-        bits = []
-        # 分块处理避免内存溢出
-        for i in range(0, len(audio_int), self._chunk_size):
-            chunk = audio_int[i:i + self._chunk_size]
-            chunk_bits = np.zeros((len(chunk), 16), dtype=np.uint8)
-
-            # 向量化操作提高性能
-            for j in range(16):
-                chunk_bits[:, 15 - j] = (chunk >> j) & 1
-
-            bits.extend(chunk_bits.flatten())
-
-        return np.array(bits, dtype=np.uint8)
-
-    def _bits2audio_safe(self, bits):
-        """比特流转音频 - 安全版本"""
-        # 确保比特数是16的倍数
-        if len(bits) % 16 != 0:
-            pad_len = 16 - (len(bits) % 16)
-            bits = np.pad(bits, (0, pad_len), 'constant')
-
-        num_samples = len(bits) // 16
-        audio_int = np.zeros(num_samples, dtype=np.int32)
-
-        # 向量化操作
-        bits_reshaped = bits.reshape(-1, 16)
-
-        for i in range(num_samples):
-            bit_group = bits_reshaped[i]
-            # 构建16位整数
-            val = 0
-            for bit in bit_group:
-                val = (val << 1) | int(bit)
-
-            # 转换为有符号整数
-            if val & 0x8000:
-                val -= 65536
-
-            audio_int[i] = np.clip(val, self._int16_min, self._int16_max)
-
-        # 转换为float32
-        audio_float = audio_int.astype(np.float32) / 32768.0
-        audio_float = np.clip(audio_float, -1.0, 1.0).astype(np.float32)
-
-        return audio_float
+        """音频转比特流 - 安全版本 (多声道输入按最后一维展开，形状 (..., 16*采样点数))"""
+        return np.unpackbits(_audio_to_packed(audio), axis=-1)
 
     def _add_noise(self, bits):
         """模拟信道误码"""
         if self.error_rate <= 0:
             return bits.copy()
 
-        noise = np.random.choice([0, 1], size=len(bits),
-                                 p=[1 - self.error_rate, self.error_rate])
-        return (bits + noise) % 2
+        noisy = bits.copy()
+        noisy.reshape(-1)[_sparse_flip_positions(self._rng, bits.size, self.error_rate)] ^= 1
+        return noisy
 
     def process(self, audio, samplerate):
         """核心处理流程"""
         try:
             # 保存原始信息
             original_shape = audio.shape
-            original_dtype = audio.dtype
 
             # 确保是二维数组
             if audio.ndim == 1:
                 audio = audio.reshape(1, -1)
 
-            processed_channels = []
+            result = np.empty(audio.shape, dtype=np.float32)
 
+            # 0. 静音声道 (幅度低于量化最低位) 与恒定声道 (如直流) 跳过整条编解码链路
+            active = []
             for chan_idx, chan in enumerate(audio):
-                # 1. 音频转比特
-                bits = self._audio2bits_safe(chan)
-
-                # 2. 补零使比特数为4的整数倍
-                orig_len = len(bits)
-                pad_len = (4 - orig_len % 4) % 4
-                bits_pad = np.pad(bits, (0, pad_len), 'constant')
-
-                # 3. 汉明码编码
-                coded = []
-                num_groups = len(bits_pad) // 4
-                for i in range(num_groups):
-                    start_idx = i * 4
-                    coded.extend(self._hamming_7_4_encode(bits_pad[start_idx:start_idx + 4].tolist()))
-
-                # 4. 模拟信道误码
-                coded_noise = self._add_noise(np.array(coded, dtype=np.uint8))
-
-                # 5. 汉明码解码
-                decoded = []
-                num_coded_groups = len(coded_noise) // 7
-                for i in range(num_coded_groups):
-                    start_idx = i * 7
-                    decoded.extend(self._hamming_7_4_decode(coded_noise[start_idx:start_idx + 7].tolist()))
-
-                # 6. 去除补零
-                decoded = decoded[:orig_len]
-
-                # 7. 比特转音频
-                chan_proc = self._bits2audio_safe(np.array(decoded, dtype=np.uint8))
-
-                # 裁剪到原长度
-                target_len = min(len(chan_proc), len(chan))
-                processed_channels.append(chan_proc[:target_len])
-
-            # 合并通道
-            if len(processed_channels) == 1:
-                result = processed_channels[0]
-            else:
-                result = np.vstack(processed_channels)
+                if not chan.any() or np.abs(chan).max() < 1.0 / self._int16_max:
+                    result[chan_idx] = 0.0
+                elif not np.diff(chan).any():
+                    # 各采样码字相同，只量化一个采样再铺满
+                    result[chan_idx] = _bits_to_audio(self._audio2bits_safe(chan[:1]))[0]
+                else:
+                    active.append(chan_idx)
+
+            if active:
+                if NUMBA_AVAILABLE:
+                    # 1-4. 紧凑比特 (每字节两个4位分组) 直接进入 编码 + 误码 + 解码 融合内核
+                    # 不展开为每位一字节，内存占用与访存量均为逐位版本的 1/8
+                    packed = np.ascontiguousarray(_audio_to_packed(audio[active]))
+                    decoded = np.empty_like(packed)
+
+                    # 误码以每个码字的7位翻转掩码传入内核，只对抽中的位置赋值
+                    num_groups = packed.size * 2
+                    pos = _sparse_flip_positions(self._rng, num_groups * 7, self.error_rate)
+                    flips = np.zeros(num_groups, dtype=np.uint8)
+                    np.bitwise_xor.at(flips, pos // 7, (1 << (pos % 7)).astype(np.uint8))
+
+                    encode_decode_packed(packed.reshape(-1), decoded.reshape(-1), flips)
+
+                    # 5. 比特转音频，按声道拆回
+                    result[active] = _packed_to_audio(decoded)
+                else:
+                    # 1. 音频转比特：所有待处理声道合并为一条比特流
+                    # 每个采样16位，比特数天然是4的整数倍，无需补零
+                    bits = self._audio2bits_safe(audio[active]).ravel()
+
+                    # 2. 汉明码编码
+                    coded = _hamming_encode_batch(bits)
+
+                    # 3. 模拟信道误码
+                    coded_noise = self._add_noise(coded)
+
+                    # 4. 汉明码解码
+                    decoded = _hamming_decode_batch(coded_noise)
+
+                    # 5. 比特转音频，按声道拆回
+                    result[active] = _bits_to_audio(decoded).reshape(len(active), -1)
 
             # 恢复原始形状
-            if len(original_shape) == 1:
-                result = result.flatten()
-
-            # 确保输出类型和长度匹配
-            result = result.astype(np.float32)
-            if result.shape != original_shape:
-                result = result.reshape(original_shape)
-
-            return result
+            return result.reshape(original_shape)
 
         except Exception as e:
             print(f"汉明码处理错误：{e}，返回原始音频")
@@ -192,18 +201,32 @@ class CRC32Effect(AudioEffect):
         self._int16_min = -32768
         self._int16_max = 32767
         self.bit_depth = 16
-        self._chunk_size = 1000
-
-    def _crc32_encode(self, data_bits):
-        """对数据比特流附加32位CRC校验位"""
-        crc = 0xFFFFFFFF
-        for bit in data_bits:
-            bit_int = int(bit)
-            crc = (crc >> 1) ^ self.polynomial if ((crc ^ bit_int) & 1) else crc >> 1
+        self._rng = np.random.default_rng()
+        # 累计的 CRC 校验失败次数 (按声道计)
+        self.crc_failures = 0
+
+    def _crc32(self, data_bits):
+        """
+        计算比特流的 CRC32，结果以32位比特数组 (高位在前) 返回
+        0xEDB88320 即 zlib 使用的反射 IEEE 多项式，逐位算法每次取寄存器最低位，
+        因此每8位按低位在前打包成字节后交给 zlib.crc32，结果与逐位计算完全一致
+        """
+        data_bits = np.asarray(data_bits, dtype=np.uint8)
+        n_full = len(data_bits) // 8 * 8
+        data_bytes = np.packbits(data_bits[:n_full], bitorder='little').tobytes()
+
+        # zlib 返回值已做过末尾取反，取反还原为寄存器状态以便续算剩余不足一字节的比特
+        crc = zlib.crc32(data_bytes) ^ 0xFFFFFFFF
+        for bit in data_bits[n_full:]:
+            crc = (crc >> 1) ^ self.polynomial if ((crc ^ int(bit)) & 1) else crc >> 1
         crc ^= 0xFFFFFFFF
 
-        crc_bits = [(crc >> i) & 1 for i in range(self.crc_length - 1, -1, -1)]
-        return np.concatenate([data_bits, crc_bits])
+        return np.unpackbits(np.array([crc], dtype='>u4').view(np.uint8))
+
+    def _crc32_packed(self, data_bytes):
+        """紧凑比特流 (每字节高位在前) 的 CRC32，以4字节大端形式返回，即32位校验位的紧凑表示"""
+        crc = zlib.crc32(_BIT_REVERSE[data_bytes].tobytes())
+        return np.array([crc], dtype='>u4').view(np.uint8)
 
     def _crc32_check(self, coded_bits):
         """校验CRC校验位"""
@@ -214,71 +237,21 @@ class CRC32Effect(AudioEffect):
         crc_bits = coded_bits[-self.crc_length:]
 
         # 重新计算CRC
-        crc = 0xFFFFFFFF
-        for bit in data_bits:
-            bit_int = int(bit)
-            crc = (crc >> 1) ^ self.polynomial if ((crc ^ bit_int) & 1) else crc >> 1
-        crc ^= 0xFFFFFFFF
-
-        computed_crc = [(crc >> i) & 1 for i in range(self.crc_length - 1, -1, -1)]
+        computed_crc = self._crc32(data_bits)
         is_valid = np.array_equal(computed_crc, crc_bits)
         return is_valid, data_bits
 
-    def _add_noise(self, bits):
-        """模拟信道误码"""
+    def _add_noise(self, packed):
+        """模拟信道误码 (紧凑比特流)"""
         if self.error_rate <= 0:
-            return bits.copy()
-
-        noise = np.random.choice([0, 1], size=len(bits),
-                                 p=[1 - self.error_rate, self.error_rate])
-        return (bits + noise) % 2
-
-    def _audio2bits_safe(self, audio):
-        """音频转比特流：安全版"""
-        if audio.dtype == np.float32:
-            audio = np.clip(audio, -1.0, 1.0).astype(np.float32)
-            audio_int = np.clip(audio * 32767, self._int16_min, self._int16_max).astype(np.int32)
-        else:
-            audio_int = np.clip(audio, self._int16_min, self._int16_max).astype(np.int32)
-
-        bits = []
-        for i in range(0, len(audio_int), self._chunk_size):
-            chunk = audio_int[i:i + self._chunk_size]
-            chunk_bits = np.zeros((len(chunk), 16), dtype=np.uint8)
-
-            for j in range(16):
-                chunk_bits[:, 15 - j] = (chunk >> j) & 1
-
-            bits.extend(chunk_bits.flatten())
-
-        return np.array(bits, dtype=np.uint8)
+            return packed.copy()
 
-    def _bits2audio_safe(self, bits):
-        """比特流转音频"""
-        if len(bits) % 16 != 0:
-            pad_len = 16 - (len(bits) % 16)
-            bits = np.pad(bits, (0, pad_len), 'constant')
-
-        num_samples = len(bits) // 16
-        audio_int = np.zeros(num_samples, dtype=np.int32)
-
-        bits_reshaped = bits.reshape(-1, 16)
-
-        for i in range(num_samples):
-            bit_group = bits_reshaped[i]
-            val = 0
-            for bit in bit_group:
-                val = (val << 1) | int(bit)
-
-            if val & 0x8000:
-                val -= 65536
-
-            audio_int[i] = np.clip(val, self._int16_min, self._int16_max)
-
-        audio_float = audio_int.astype(np.float32) / 32768.0
-        audio_float = np.clip(audio_float, -1.0, 1.0).astype(np.float32)
-
-        return audio_float
+        # 第 p 位位于第 p//8 字节，高位在前
+        noisy = packed.copy()
+        pos = _sparse_flip_positions(self._rng, packed.size * 8, self.error_rate)
+        # 同一字节可能抽中多位，用 ufunc.at 逐个累积异或
+        np.bitwise_xor.at(noisy.reshape(-1), pos >> 3, (0x80 >> (pos & 7)).astype(np.uint8))
+        return noisy
 
     def process(self, audio, samplerate):
         """CRC32处理流程"""
@@ -288,36 +261,31 @@ class CRC32Effect(AudioEffect):
             if audio.ndim == 1:
                 audio = audio.reshape(1, -1)
 
-            processed_channels = []
-
-            for chan in audio:
-                bits = self._audio2bits_safe(chan)
-                crc_coded = self._crc32_encode(bits)
-                coded_noise = self._add_noise(crc_coded)
-                is_valid, after_crc = self._crc32_check(coded_noise)
-
-                if not is_valid:
-                    print("CRC校验失败，存在未纠正错误")
+            crc_bytes = self.crc_length // 8
 
-                chan_proc = self._bits2audio_safe(after_crc)
-                # 确保输出长度匹配
-                target_len = min(len(chan_proc), len(chan))
-                processed_channels.append(chan_proc[:target_len])
+            # 1. 音频转紧凑比特流 (每字节8位)，所有声道一次转换，形状 (C, 2N)
+            data = _audio_to_packed(audio)
 
-            if len(processed_channels) == 1:
-                result = processed_channels[0]
-            else:
-                result = np.vstack(processed_channels)
+            # 2. CRC编码：每个声道各自附加4字节校验值，直接写入预分配的码流
+            crc_coded = np.empty((data.shape[0], data.shape[1] + crc_bytes), dtype=np.uint8)
+            crc_coded[:, :-crc_bytes] = data
+            for i, row in enumerate(data):
+                crc_coded[i, -crc_bytes:] = self._crc32_packed(row)
 
-            if len(original_shape) == 1:
-                result = result.flatten()
+            # 3. 加噪
+            coded_noise = self._add_noise(crc_coded)
 
-            result = result.astype(np.float32)
-            # 确保形状匹配
-            if result.shape != original_shape:
-                result = result.reshape(original_shape)
+            # 4. CRC校验
+            #    逐声道打印会在分块处理时拖慢热路径，只累计失败次数，每次调用至多记录一条日志
+            after_crc = np.ascontiguousarray(coded_noise[:, :-crc_bytes])
+            failures = sum(not np.array_equal(self._crc32_packed(row), received)
+                           for row, received in zip(after_crc, coded_noise[:, -crc_bytes:]))
+            if failures:
+                self.crc_failures += failures
+                logger.debug("CRC校验失败：%d个声道存在未纠正错误 (累计%d次)", failures, self.crc_failures)
 
-            return result
+            # 5. 转回音频，恢复原始形状
+            return _packed_to_audio(after_crc).reshape(original_shape)
 
         except Exception as e:
             print(f"CRC32处理错误：{e}，返回原始音频")
@@ -334,6 +302,8 @@ class CombinedChannelCodeEffect(AudioEffect):
         self._int16_min = -32768
         self._int16_max = 32767
         self.error_rate = 0.0001
+        self._rng = np.random.default_rng()
+        self.crc_failures = 0
 
     def process(self, audio, samplerate):
         try:
@@ -342,67 +312,41 @@ class CombinedChannelCodeEffect(AudioEffect):
             if audio.ndim == 1:
                 audio = audio.reshape(1, -1)
 
-            processed_channels = []
+            num_chans = audio.shape[0]
 
-            for chan in audio:
-                # 1. 音频转比特
-                bits = self.hamming._audio2bits_safe(chan)
+            # 1. 音频转比特：所有声道一次转换，形状 (C, 16N)
+            # 每个采样16位，比特数天然是4的整数倍，无需补零
+            bits = self.hamming._audio2bits_safe(audio)
 
-                # 2. 汉明码编码
-                orig_len = len(bits)
-                pad_len = (4 - orig_len % 4) % 4
-                bits_pad = np.pad(bits, (0, pad_len), 'constant')
+            # 2. 汉明码编码：各声道首尾相接批量编码，再按声道拆回 (C, 28N)
+            hamming_coded = _hamming_encode_batch(bits).reshape(num_chans, -1)
 
-                hamming_coded = []
-                num_groups = len(bits_pad) // 4
-                for i in range(num_groups):
-                    start_idx = i * 4
-                    hamming_coded.extend(self.hamming._hamming_7_4_encode(bits_pad[start_idx:start_idx + 4].tolist()))
-                hamming_coded = np.array(hamming_coded, dtype=np.uint8)
+            # 3. CRC编码：每个声道各自附加32位校验位，直接写入预分配的码流
+            coded_len = hamming_coded.shape[1]
+            crc_coded = np.empty((num_chans, coded_len + self.crc.crc_length), dtype=np.uint8)
+            crc_coded[:, :coded_len] = hamming_coded
+            for i, row in enumerate(hamming_coded):
+                crc_coded[i, coded_len:] = self.crc._crc32(row)
 
-                # 3. CRC编码
-                crc_coded = self.crc._crc32_encode(hamming_coded)
+            # 4. 加噪
+            coded_noise = crc_coded
+            coded_noise.reshape(-1)[_sparse_flip_positions(self._rng, crc_coded.size, self.error_rate)] ^= 1
 
-                # 4. 加噪
-                noise = np.random.choice([0, 1], size=len(crc_coded),
-                                         p=[1 - self.error_rate, self.error_rate])
-                coded_noise = (crc_coded + noise) % 2
+            # 5. CRC校验
+            after_crc = np.empty_like(hamming_coded)
+            failures = 0
+            for i, row in enumerate(coded_noise):
+                is_valid, after_crc[i] = self.crc._crc32_check(row)
+                failures += not is_valid
+            if failures:
+                self.crc_failures += failures
+                logger.debug("CRC校验失败：%d个声道 (累计%d次)", failures, self.crc_failures)
 
-                # 5. CRC校验
-                is_valid, after_crc = self.crc._crc32_check(coded_noise)
-                if not is_valid:
-                    print("CRC校验失败")
+            # 6. 汉明码解码
+            decoded = _hamming_decode_batch(after_crc)
 
-                # 6. 汉明码解码
-                decoded = []
-                num_coded_groups = len(after_crc) // 7
-                for i in range(num_coded_groups):
-                    start_idx = i * 7
-                    decoded.extend(self.hamming._hamming_7_4_decode(after_crc[start_idx:start_idx + 7].tolist()))
-
-                # 确保解码后的长度正确
-                decoded = decoded[:orig_len]
-
-                # 7. 转回音频
-                chan_proc = self.hamming._bits2audio_safe(np.array(decoded, dtype=np.uint8))
-
-                # 裁剪到原长度
-                target_len = min(len(chan_proc), len(chan))
-                processed_channels.append(chan_proc[:target_len])
-
-            if len(processed_channels) == 1:
-                result = processed_channels[0]
-            else:
-                result = np.vstack(processed_channels)
-
-            if len(original_shape) == 1:
-                result = result.flatten()
-
-            result = result.astype(np.float32)
-            if result.shape != original_shape:
-                result = result.reshape(original_shape)
-
-            return result
+            # 7. 转回音频，恢复原始形状
+            return _bits_to_audio(decoded).reshape(original_shape)
 
         except Exception as e:
             print(f"组合编码处理错误：{e}，返回原始音频")
@@ -415,29 +359,15 @@ class HammingEncoder(AudioEffect):
     def __init__(self, error_rate=0.0001):
         super().__init__(name="Hamming Encoder")
         self.error_rate = error_rate
+        # 分块流水线中每块都会调用 process，默认不输出进度信息
+        self.verbose = False
         self._int16_min = -32768
         self._int16_max = 32767
-        self._chunk_size = 1000
 
     def _audio2bits(self, audio):
         """音频转比特流"""
-        if audio.dtype == np.float32:
-            audio = np.clip(audio, -1.0, 1.0).astype(np.float32)
-            audio_int = np.clip(audio * 32767, self._int16_min, self._int16_max).astype(np.int32)
-        else:
-            audio_int = np.clip(audio, self._int16_min, self._int16_max).astype(np.int32)
-
-        bits = []
-        for i in range(0, len(audio_int), self._chunk_size):
-            chunk = audio_int[i:i + self._chunk_size]
-            chunk_bits = np.zeros((len(chunk), 16), dtype=np.uint8)
-
-            for j in range(16):
-                chunk_bits[:, 15 - j] = (chunk >> j) & 1
-
-            bits.extend(chunk_bits.flatten())
-
-        return np.array(bits, dtype=np.uint8)
+        # 大端 int16 的字节序即高位在前，一次性展开为比特流
+        return np.unpackbits(_audio_to_packed(audio))
 
     def _hamming_encode_only(self, bits):
         """只编码，不添加噪声"""
@@ -445,26 +375,18 @@ class HammingEncoder(AudioEffect):
         pad_len = (4 - orig_len % 4) % 4
         bits_pad = np.pad(bits, (0, pad_len), 'constant')
 
-        coded = []
-        num_groups = len(bits_pad) // 4
-        for i in range(num_groups):
-            start_idx = i * 4
-            d1, d2, d3, d4 = bits_pad[start_idx:start_idx + 4]
-            p1 = d1 ^ d2 ^ d4
-            p2 = d1 ^ d3 ^ d4
-            p3 = d2 ^ d3 ^ d4
-            coded.extend([p1, p2, d1, p3, d2, d3, d4])
+        coded = _hamming_encode_batch(bits_pad)
 
         # 计算实际输出长度
         output_len = orig_len * 7 // 4
-        return np.array(coded[:output_len], dtype=np.uint8)
+        return coded[:output_len]
 
     def process(self, audio, samplerate):
         """输入音频，输出编码后的比特流"""
-        print("🔢 汉明编码器：音频 → 编码比特流")
         bits = self._audio2bits(audio.flatten())
         encoded = self._hamming_encode_only(bits)
-        print(f"   编码完成：{len(bits)}位 → {len(encoded)}位")
+        if self.verbose:
+            logger.debug("汉明编码器：音频 → 编码比特流，%d位 → %d位", len(bits), len(encoded))
         return encoded
 
 
@@ -474,74 +396,24 @@ class HammingDecoder(AudioEffect):
     def __init__(self, error_rate=0.0001):
         super().__init__(name="Hamming Decoder")
         self.error_rate = error_rate
-        self._chunk_size = 1000
+        # 分块流水线中每块都会调用 process，默认不输出进度信息
+        self.verbose = False
         self._int16_min = -32768
         self._int16_max = 32767
 
     def _hamming_decode_only(self, coded_bits):
         """只解码，不添加噪声"""
-        decoded = []
-
         # 确保输入长度是7的倍数
         if len(coded_bits) % 7 != 0:
             pad_len = 7 - (len(coded_bits) % 7)
             coded_bits = np.pad(coded_bits, (0, pad_len), 'constant')
 
-        num_groups = len(coded_bits) // 7
-        for i in range(num_groups):
-            start_idx = i * 7
-            group = coded_bits[start_idx:start_idx + 7]
-
-            if len(group) < 7:
-                break
-
-            p1, p2, d1, p3, d2, d3, d4 = group
-
-            # 计算伴随式
-            s1 = p1 ^ d1 ^ d2 ^ d4
-            s2 = p2 ^ d1 ^ d3 ^ d4
-            s3 = p3 ^ d2 ^ d3 ^ d4
-
-            # 纠错
-            error_pos = s3 * 4 + s2 * 2 + s1 * 1
-            if error_pos != 0 and error_pos <= 7:
-                # 在本地副本上纠错
-                group = group.copy()
-                group[error_pos - 1] = 1 - group[error_pos - 1]
-                p1, p2, d1, p3, d2, d3, d4 = group
-
-            decoded.extend([d1, d2, d3, d4])
-
-        return np.array(decoded, dtype=np.uint8)
-
-    def _bits2audio(self, bits):
-        """比特流转音频"""
-        if len(bits) % 16 != 0:
-            pad_len = 16 - (len(bits) % 16)
-            bits = np.pad(bits, (0, pad_len), 'constant')
-
-        num_samples = len(bits) // 16
-        audio = np.zeros(num_samples, dtype=np.float32)
-
-        bits_reshaped = bits.reshape(-1, 16)
-
-        for i in range(num_samples):
-            bit_group = bits_reshaped[i]
-            val = 0
-            for bit in bit_group:
-                val = (val << 1) | int(bit)
-
-            if val & 0x8000:
-                val -= 65536
-
-            audio[i] = np.clip(val / 32768.0, -1.0, 1.0)
-
-        return audio
+        return _hamming_decode_batch(coded_bits)
 
     def process(self, coded_bits, samplerate):
         """输入编码比特流，输出解码音频"""
-        print("汉明解码器：编码比特流 → 音频")
         decoded_bits = self._hamming_decode_only(coded_bits)
-        audio = self._bits2audio(decoded_bits)
-        print(f"   解码完成：{len(coded_bits)}位 → {len(audio)}采样点")
+        audio = _bits_to_audio(decoded_bits)
+        if self.verbose:
+            logger.debug("汉明解码器：编码比特流 → 音频，%d位 → %d采样点", len(coded_bits), len(audio))
         return audio
\ No newline at end of file
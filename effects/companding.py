@@ -1,5 +1,6 @@
 import numpy as np
 from .base import AudioEffect
+from ._utils import peak_amplitude
 
 
 class CompandingStyle(AudioEffect):
@@ -15,54 +16,71 @@ class CompandingStyle(AudioEffect):
         self.A = A
         self.enable_companding = enable_companding
 
+        # 压扩时只有 levels+1 个可能的输出，预先算好查找表，处理时不再逐采样计算 log/exp
+        # 第 k 级的判决门限 = 压缩域边界 (2k/levels - 1) 经扩张映射回线性域的位置
+        self._thresholds = None
+        self._expand_lut = None
+        if enable_companding and bit_depth <= 16:
+            grid = np.arange(self.levels + 1) / self.levels * 2.0 - 1.0
+            self._expand_lut = self._a_law_expand(grid)
+            self._thresholds = self._expand_lut[1:].copy()
+            # 压缩曲线满幅处恰为 1，最高门限取精确值，避免 exp 舍入使满幅采样落到次高级
+            self._thresholds[-1] = 1.0
+
     def _a_law_compress(self, x):
-        x = x.copy()
-        sign = np.sign(x)
         abs_x = np.abs(x)
-        y = np.zeros_like(x)
-
         denom = 1 + np.log(self.A)
-        mask_small = abs_x < (1 / self.A)
-        y[mask_small] = (self.A * abs_x[mask_small]) / denom
 
-        mask_large = ~mask_small
-        y[mask_large] = (1 + np.log(self.A * abs_x[mask_large])) / denom
-        return sign * y
+        # 两段同时计算后按门限选择；log 的参数下限保护小信号段不产生 -inf
+        small = (self.A * abs_x) / denom
+        large = (1 + np.log(np.maximum(self.A * abs_x, 1e-30))) / denom
+        y = np.sign(x) * np.where(abs_x < (1 / self.A), small, large)
+        return y.astype(np.result_type(x, np.float32), copy=False)
 
     def _a_law_expand(self, y):
-        y = y.copy()
-        sign = np.sign(y)
         abs_y = np.abs(y)
-        x = np.zeros_like(y)
-
         denom = 1 + np.log(self.A)
         threshold = 1 / denom
 
-        mask_small = abs_y < threshold
-        x[mask_small] = (abs_y[mask_small] * denom) / self.A
-
-        mask_large = ~mask_small
-        x[mask_large] = np.exp(abs_y[mask_large] * denom - 1) / self.A
-        return sign * x
+        small = (abs_y * denom) / self.A
+        large = np.exp(abs_y * denom - 1) / self.A
+        x = np.sign(y) * np.where(abs_y < threshold, small, large)
+        return x.astype(np.result_type(y, np.float32), copy=False)
 
     def process(self, audio, samplerate):
-        # 0. 归一化输入防止越界
-        max_val = np.max(np.abs(audio))
-        if max_val > 1.0: audio = audio / max_val
+        # 0. 归一化输入防止越界：峰值超过 1 时整体缩放，缩放系数并入后续计算，不单独生成归一化副本
+        max_val = peak_amplitude(audio)
+        scale = max_val if max_val > 1.0 else 1.0
+        dtype = audio.dtype if audio.dtype.kind == 'f' else np.float64
+
+        if self._expand_lut is not None:
+            # 1-3. 查表：门限随峰值缩放后二分查找得到量化级，再直接取该级的扩张输出
+            thresholds = (self._thresholds * scale).astype(dtype)
+            levels = np.searchsorted(thresholds, audio, side='right')
+            return self._expand_lut.astype(dtype)[levels]
 
         signal = audio
 
+        # 以下为闭式计算路径，仅在位深超过 16 位 (不建查找表) 或关闭压扩时使用
+        # 注：实测 np.interp 稠密网格插值比直接计算 log/exp 慢数倍 (逐采样二分查找)，故保留闭式计算
         # 1. 压缩 (Compression)
         if self.enable_companding:
+            if scale != 1.0:
+                signal = signal / scale
+                scale = 1.0
             signal = self._a_law_compress(signal)
 
         # 2. 量化 (Quantization)
-        signal = (signal + 1.0) / 2.0
-        signal = np.floor(signal * self.levels) / self.levels
-        signal = signal * 2.0 - 1.0
+        # (x + 1) / 2 * levels 合并为一次乘加，取整与还原都在同一缓冲区原地完成
+        half = self.levels / 2.0
+        signal = np.multiply(signal, half / scale, dtype=dtype)
+        signal += half
+        np.floor(signal, out=signal)
+        signal /= half
+        signal -= 1.0
 
         # 3. 扩张 (Expansion)
         if self.enable_companding:
             signal = self._a_law_expand(signal)
 
-        return signal
\ No newline at end of file
+        return signal
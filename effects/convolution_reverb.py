@@ -1,6 +1,8 @@
 import numpy as np
-import scipy.signal
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal import chirp
 from .base import AudioEffect
+from ._utils import peak_amplitude
 
 class ConvolutionReverb(AudioEffect):
     """
@@ -13,53 +15,78 @@ class ConvolutionReverb(AudioEffect):
         self.mix = mix
         self.ir = self._generate_synthetic_ir(ir_type)
 
+        # 整块长度 (8 倍脉冲响应长度) 下的脉冲响应频谱缓存，首次用到时计算
+        self._ir_fft = None
+
     def _generate_synthetic_ir(self, ir_type):
         """
-        生成模拟的脉冲响应
+        生成模拟的脉冲响应 (float32，每个实例各自随机生成)
         """
         sr = 44100
+        rng = np.random.default_rng()
         if ir_type == 'spring':
             # 模拟“弹簧混响”
             length_sec = 2.0
-            t = np.linspace(0, length_sec, int(sr * length_sec))
+            t = np.linspace(0, length_sec, int(sr * length_sec), dtype=np.float32)
             # 载波噪声 * 指数衰减
-            noise = np.random.normal(0, 1, len(t))
-            # 弹簧特有的“不断反弹”的颤动感
-            chirp = np.sin(2 * np.pi * 50 * t * t) 
-            envelope = np.exp(-3 * t) # 衰减包络
-            
-            ir = noise * chirp * envelope
-            
+            ir = rng.standard_normal(len(t), dtype=np.float32)
+            # 弹簧特有的“不断反弹”的颤动感：sin(2π·50·t²)，即瞬时频率 100t 的线性扫频
+            ir *= chirp(t, f0=0, t1=length_sec, f1=100 * length_sec, method='linear', phi=-90)
+            ir *= np.exp(-3 * t) # 衰减包络
+
         elif ir_type == 'old_radio':
             # 模拟“小盒子内部反射”：短、闷
             length_sec = 0.2
-            t = np.linspace(0, length_sec, int(sr * length_sec))
-            noise = np.random.normal(0, 1, len(t))
+            t = np.linspace(0, length_sec, int(sr * length_sec), dtype=np.float32)
+            ir = rng.standard_normal(len(t), dtype=np.float32)
             # 这是一个低通滤波特性的极短混响
-            envelope = np.exp(-20 * t) 
-            ir = noise * envelope
-            
+            ir *= np.exp(-20 * t)
+
         # 归一化，防止能量过大
-        return ir / np.max(np.abs(ir))
+        ir *= 1.0 / peak_amplitude(ir)
+        return ir
 
-    def process(self, audio, samplerate):
-        wet_signal_max_len = audio.shape[1]
-        wet_channels = []
+    def _get_ir_fft(self, nfft, full_block):
+        """
+        取指定 FFT 长度下的脉冲响应频谱
+        只缓存固定的整块长度；短输入的块长随输入长度变化，直接计算，缓存不随之增长
+        """
+        if nfft != full_block:
+            return rfft(self.ir, nfft)
+        if self._ir_fft is None:
+            self._ir_fft = rfft(self.ir, nfft)
+        return self._ir_fft
 
-        for i in range(audio.shape[0]): # 遍历左、右声道
-            channel_audio = audio[i]
-            
-            # y[n] = x[n] * h[n]
-            # 实际上是 IFFT( FFT(x) * FFT(h) )
-            convolved = scipy.signal.fftconvolve(channel_audio, self.ir, mode='full')
-            
-            # 取前半部分对齐
-            wet_channels.append(convolved[:wet_signal_max_len])
+    def _convolve(self, x):
+        """
+        重叠保留法分块卷积，沿最后一维处理 (多声道一次批量 FFT)，返回线性卷积的前 n 个采样
+        块长取 8 倍脉冲响应长度 (短输入则一块覆盖全部)，前 len(ir)-1 个输出受循环卷积混叠影响而丢弃
+        """
+        ir_len = len(self.ir)
+        n = x.shape[-1]
+        full_block = next_fast_len(8 * ir_len)
+        block = min(full_block, next_fast_len(n + ir_len - 1))
+        hop = block - ir_len + 1
+        ir_fft = self._get_ir_fft(block, full_block)
 
-        wet_signal = np.array(wet_channels)
-        
-        # 2. 归一化
-        wet_signal = wet_signal / (np.max(np.abs(wet_signal)) + 1e-9)
+        # 前端补 len(ir)-1 个零作为第一块的“历史”
+        padded = np.concatenate([np.zeros(x.shape[:-1] + (ir_len - 1,), dtype=x.dtype), x], axis=-1)
+        out = np.empty(x.shape, dtype=np.float32)
+        for start in range(0, n, hop):
+            seg = padded[..., start:start + block]
+            y = irfft(rfft(seg, block, axis=-1) * ir_fft, block, axis=-1)
+            count = min(hop, n - start)
+            out[..., start:start + count] = y[..., ir_len - 1:ir_len - 1 + count]
+        return out
+
+    def process(self, audio, samplerate):
+        # 1. 卷积：左右声道一起做批量 FFT
+        # y[n] = x[n] * h[n]
+        # 实际上是 IFFT( FFT(x) * FFT(h) )，只保留与输入对齐的前半部分
+        # 单精度输入使 FFT 走 float32/complex64 内核
+        audio = np.asarray(audio, dtype=np.float32)
+        wet_signal = self._convolve(audio)
         
-        # 3. 混合
-        return audio * (1 - self.mix) + wet_signal * self.mix
\ No newline at end of file
+        # 2-3. 归一化与混合比例合并为一次缩放
+        wet_signal *= self.mix / (peak_amplitude(wet_signal) + 1e-9)
+        return audio * (1 - self.mix) + wet_signal
\ No newline at end of file
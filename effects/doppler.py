@@ -1,6 +1,19 @@
+import functools
+from fractions import Fraction
 import numpy as np
-from scipy.signal import firwin, lfilter
+from scipy.fft import rfft, irfft, rfftfreq
+from scipy.signal import firwin, resample_poly
 from .base import AudioEffect  # 注意相对导入（effects文件夹内）
+from ._utils import fft_backend
+
+
+@functools.lru_cache(maxsize=8)
+def _lowpass_taps(rate):
+    """
+    过采样/降采样共用的抗混叠低通 FIR (汉明窗)
+    截止频率：归一化频率 = 1/过采样倍数（仅保留原始信号频段）；每个多相分支约31阶
+    """
+    return firwin(numtaps=30 * rate + 1, cutoff=1 / rate, window='hamming')
 
 
 class DopplerEffect(AudioEffect):
@@ -22,83 +35,58 @@ class DopplerEffect(AudioEffect):
             if hasattr(self, key):
                 setattr(self, key, value)
 
-    def _validate_freq_range(self, freq):
-        """
-        基于数字基带系统的奈奎斯特准则，约束频移后的频率范围
-        逻辑：频移后信号最高频率 ≤ 奈奎斯特频率，避免混叠失真
-        """
-        # 计算当前抽样率下的奈奎斯特频率（数字基带系统的带宽上限）
-        nyquist_freq = self.sample_rate / 2
-        # 基础频率范围：下限为音频可听域（20Hz），上限初步限制为初始设定值
-        valid_lower = max(self.freq_shift_range[0], 20)
-        valid_upper = self.freq_shift_range[1]
-
-        # 关键约束1：处理频率上限不得超过奈奎斯特频率（留1Hz余量，避免边界混叠）
-        valid_upper = min(valid_upper, nyquist_freq - 1)
-
-        # 关键约束2：预判频移后频率是否超界（多普勒因子可能导致频率放大）
-        doppler_factor = self.sound_speed / (self.sound_speed - self.speed)
-        max_shifted_freq = valid_upper * doppler_factor  # 频移后的最高频率
-        if max_shifted_freq > nyquist_freq:
-            # 动态降低处理频率上限，确保频移后仍符合奈奎斯特准则
-            valid_upper = nyquist_freq / doppler_factor
-
-        # 生成频率掩码：仅对符合奈奎斯特约束的频段进行处理
-        freq_mask = np.logical_and(freq >= valid_lower, freq <= valid_upper)
-        return freq_mask
-
     def _oversample(self, waveform):
         """
         数字基带系统的过采样处理
-        工程逻辑：先升采样（插入零值），再低通滤波（滤除镜像频率）
+        工程逻辑：升采样（插零）+ 低通滤波（滤除镜像频率），由多相滤波一步完成，不计算插入的零值
         """
-        # 1. 升采样：在原抽样点间插入（过采样倍数-1）个零值，抽样率提升至原倍数
-        oversampled_len = len(waveform) * self.oversample_rate
-        oversampled_wave = np.zeros(oversampled_len)
-        oversampled_wave[::self.oversample_rate] = waveform  # 每隔N个点放置原抽样值
-
-        # 2. 抗混叠低通滤波（基带系统核心步骤）
-        # 截止频率：归一化频率 = 1/过采样倍数（确保仅保留原始信号频段）
-        cutoff = 1 / self.oversample_rate
-        # 设计FIR低通滤波器（汉明窗，31阶-兼顾滤波效果与计算效率）
-        fir_filter = firwin(numtaps=31, cutoff=cutoff, window='hamming')
-        # 应用滤波，去除升采样引入的镜像频率（避免后续处理混叠）
-        filtered_wave = lfilter(fir_filter, 1, oversampled_wave)
-
-        return filtered_wave
+        return resample_poly(waveform, self.oversample_rate, 1, axis=-1,
+                             window=_lowpass_taps(self.oversample_rate))
 
     def _downsample(self, waveform):
         """
         数字基带系统的降采样处理
-        核心逻辑：每隔（过采样倍数）个点取一个值，丢弃冗余抽样点
+        核心逻辑：先低通滤除原奈奎斯特频率以上的成分，再每隔（过采样倍数）个点取一个值
         """
-        return waveform[::self.oversample_rate]
+        return resample_poly(waveform, 1, self.oversample_rate, axis=-1,
+                             window=_lowpass_taps(self.oversample_rate))
 
-    def _doppler_freq_shift(self, waveform):
+    def _band_limit(self, waveform, samplerate, doppler_factor):
         """
-        多普勒频移核心算法：基于傅里叶变换的频域频率缩放
+        按 freq_shift_range 限制频移后的频带
+        源信号 [下限, 上限] 内的成分经频移落在 [下限·f, 上限·f]，其余频点置零 (与频移前对源频谱加掩码等价)
+        下限不低于可听域 20Hz；超过奈奎斯特频率的部分已由重采样的多相滤波滤除
         """
-        # 1. 离散傅里叶变换（DFT）：时域波形转换为频域复数谱（获取频率特征）
-        fft_wave = np.fft.fft(waveform)
-        freq_axis = np.fft.fftfreq(len(waveform), 1 / self.sample_rate)
-
-        # 2. 计算多普勒频率缩放因子（通信原理多普勒频移公式变形）
+        lower = max(self.freq_shift_range[0], 20) * doppler_factor
+        upper = self.freq_shift_range[1] * doppler_factor
+        n = waveform.shape[-1]
+        freq = rfftfreq(n, 1 / samplerate)
+        with fft_backend():
+            spectrum = rfft(waveform, axis=-1, workers=-1)
+            spectrum[..., (freq < lower) | (freq > upper)] = 0
+            return irfft(spectrum, n=n, axis=-1, workers=-1)
+
+    def _doppler_freq_shift(self, waveform, samplerate):
+        """
+        多普勒频移核心算法：时域重采样
+        声源以多普勒因子 f 压缩时间轴，所有频率同时乘以 f，等价于按 1/f 的比例重采样
+        多相滤波自带抗混叠低通，频移后的成分不会越过奈奎斯特频率
+        """
+        # 1. 计算多普勒频率缩放因子（通信原理多普勒频移公式变形）
         doppler_factor = self.sound_speed / (self.sound_speed - self.speed)
 
-        # 3. 生成频率掩码（基于奈奎斯特准则约束的有效频段）
-        freq_mask = self._validate_freq_range(freq_axis)
+        # 2. 用有理数 up/down 逼近 1/f (分母限制在128以内，控制多相滤波器规模)
+        frac = Fraction(doppler_factor).limit_denominator(128)
+        shifted_wave = resample_poly(waveform, frac.denominator, frac.numerator, axis=-1)
 
-        # 4. 频域频率缩放（实现多普勒频移的核心步骤）
-        scaled_indices = np.round(np.arange(len(fft_wave)) * doppler_factor).astype(int)
-        valid_indices = np.logical_and(scaled_indices >= 0, scaled_indices < len(fft_wave))
+        # 3. 长度对齐：升调后信号变短，尾部补零；降调后信号变长，截断
+        n = waveform.shape[-1]
+        if shifted_wave.shape[-1] < n:
+            pad = [(0, 0)] * (shifted_wave.ndim - 1) + [(0, n - shifted_wave.shape[-1])]
+            shifted_wave = np.pad(shifted_wave, pad)
 
-        shifted_fft = np.zeros_like(fft_wave, dtype=np.complex128)
-        shifted_fft[scaled_indices[valid_indices]] = fft_wave[valid_indices] * freq_mask[valid_indices]
-
-        # 5. 逆离散傅里叶变换（IDFT）：频域谱转换回时域波形（可听音频信号）
-        shifted_wave = np.fft.ifft(shifted_fft).real
-
-        return shifted_wave
+        # 4. 频带限制 (freq_shift_range)
+        return self._band_limit(shifted_wave[..., :n], samplerate, doppler_factor)
 
     def process(self, audio, samplerate):
         """
@@ -109,33 +97,17 @@ class DopplerEffect(AudioEffect):
         :return: 处理后的音频波形，shape与输入一致
         """
         self.sample_rate = samplerate  # 缓存当前音频抽样率
-        processed_channels = []
-
-        # 对每个声道单独处理（适配多通道音频）
-        for chan in audio:
-            # 1：过采样处理（若开启）- 数字基带系统抗混叠前置操作
-            if self.oversample_enable:
-                self.sample_rate *= self.oversample_rate
-                oversampled_chan = self._oversample(chan)
-                current_chan = oversampled_chan
-            else:
-                current_chan = chan
-
-            # 2：多普勒频移核心处理（基于奈奎斯特约束的频域缩放）
-            shifted_chan = self._doppler_freq_shift(current_chan)
-
-            # 3：降采样处理（若开启）- 还原为原始抽样率，匹配音频输出
-            if self.oversample_enable:
-                downsampled_chan = self._downsample(shifted_chan)
-                # 抽样率恢复为原始值，避免影响后续处理
-                self.sample_rate /= self.oversample_rate
-                processed_chan = downsampled_chan
-            else:
-                processed_chan = shifted_chan
-
-            processed_channels.append(processed_chan)
-
-        return np.array(processed_channels)
+
+        # 所有声道沿最后一维一起处理（适配多通道音频，多相滤波按声道批量执行）
+        # 1：过采样处理（若开启）- 数字基带系统抗混叠前置操作
+        current = self._oversample(audio) if self.oversample_enable else audio
+        current_rate = samplerate * self.oversample_rate if self.oversample_enable else samplerate
+
+        # 2：多普勒频移核心处理（时域重采样 + 频带限制）
+        shifted = self._doppler_freq_shift(current, current_rate)
+
+        # 3：降采样处理（若开启）- 还原为原始抽样率，匹配音频输出
+        return self._downsample(shifted) if self.oversample_enable else shifted
 
     def get_params(self):
         """
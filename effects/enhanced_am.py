@@ -1,6 +1,29 @@
 import numpy as np
-from scipy.signal import butter, lfilter, hilbert
+import scipy.fft
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.signal import fftconvolve
 from .base import AudioEffect
+from ._utils import butter_sos, channel_peaks, sosfilt_channels
+
+
+def _cosine(freq, phase, length, sample_rate, block=1024):
+    """
+    float32 余弦载波 cos(2π·freq·n/fs + phase)，phase 可为标量或 (通道数, 1) 数组
+    相当于分块的相量旋转：把 n 拆成 块序号·block + 块内偏移，按和角公式
+    cos(a + b) = cos a·cos b − sin a·sin b，只需对块起点和块内偏移各计算一次三角函数，
+    其余每个采样只是一次外积乘加；相位在 float64 下计算，不会随长度累积误差
+    """
+    omega = 2 * np.pi * freq / sample_rate
+    num_blocks = -(-length // block)
+    a = omega * block * np.arange(num_blocks) + np.asarray(phase, dtype=np.float64)
+    b = omega * np.arange(block)
+    cos_a, sin_a = np.cos(a).astype(np.float32), np.sin(a).astype(np.float32)
+    cos_b, sin_b = np.cos(b).astype(np.float32), np.sin(b).astype(np.float32)
+
+    out = cos_a[..., np.newaxis] * cos_b
+    out -= sin_a[..., np.newaxis] * sin_b
+    return out.reshape(*out.shape[:-2], -1)[..., :length]
+
 
 class EnhancedAMEffect(AudioEffect):
     """
@@ -26,42 +49,53 @@ class EnhancedAMEffect(AudioEffect):
             if hasattr(self, key):  # 只处理类中已定义的属性
                 setattr(self, key, value)
 
+        # 3. 随机数发生器 (载波同步误差与信道噪声) 与复用的噪声缓冲区
+        self._rng = np.random.default_rng()
+        self._noise_buf = np.empty(0, dtype=np.float32)
+
     def _preprocess_audio(self, audio_wave):
         """
-        归一化 + 预加重
+        归一化 + 预加重，audio_wave 形状为 (通道数, 采样点数)
         """
-        # 1. 峰值归一化
-        peak = np.max(np.abs(audio_wave))
-        if peak != 0:
-            audio_wave = audio_wave / peak
+        # 1. 逐声道峰值归一化 (静音声道保持不变)
+        peaks = channel_peaks(audio_wave)
+        audio_wave = audio_wave * np.divide(1.0, peaks, out=np.ones_like(peaks), where=peaks != 0)
 
         # 2. 预加重：一阶高通滤波
         if self.pre_emphasis:
-            b, a = butter(1, 3000, btype='highpass', fs=self.sample_rate)
-            audio_wave = lfilter(b, a, audio_wave)
+            sos = butter_sos(1, 3000, 'highpass', self.sample_rate)
+            audio_wave = sosfilt_channels(sos, audio_wave)
 
         return audio_wave
 
-    def _generate_carrier(self, length):
+    def _standard_noise(self, shape):
         """
-        生成带同步误差的载波信号
+        标准正态噪声，直接生成到复用的缓冲区中 (按需扩容)，不为每次调用分配新数组
+        返回的是缓冲区视图，只在下一次调用前有效
         """
-        # 生成时间轴
-        t = np.linspace(0, length / self.sample_rate, length, endpoint=False)
+        size = int(np.prod(shape))
+        if self._noise_buf.size < size:
+            self._noise_buf = np.empty(size, dtype=np.float32)
+        noise = self._noise_buf[:size].reshape(shape)
+        self._rng.standard_normal(dtype=np.float32, out=noise)
+        return noise
 
+    def _generate_carrier(self, length):
+        """
+        生成带同步误差的载波信号 (所有声道共用同一载波)
+        """
         # 模拟载波同步误差
-        freq_offset = self.carrier_freq * self.carrier_sync_tol * np.random.uniform(-1, 1)
-        phase_offset = np.random.uniform(0, 2 * np.pi)
+        freq_offset = self.carrier_freq * self.carrier_sync_tol * self._rng.uniform(-1, 1)
+        phase_offset = self._rng.uniform(0, 2 * np.pi)
 
-        # 生成载波信号
-        carrier = np.cos(2 * np.pi * (self.carrier_freq + freq_offset) * t + phase_offset)
-        return carrier
+        # 生成载波信号：分块和角展开，不对每个采样调用余弦
+        return _cosine(self.carrier_freq + freq_offset, phase_offset, length, self.sample_rate)
 
     def _am_modulate(self, audio_wave):
         """
         多模式AM调制：standard/DSB-SC/SSB
         """
-        length = len(audio_wave)
+        length = audio_wave.shape[-1]
         carrier = self._generate_carrier(length)  # 生成载波
 
         # 1. 标准AM调制
@@ -74,34 +108,39 @@ class EnhancedAMEffect(AudioEffect):
 
         # 3. SSB
         elif self.am_mode == "ssb":
-            analytic_signal = hilbert(audio_wave)
-            dsb_modulated = self.modulation_index * analytic_signal * carrier
-            b, a = butter(2, self.carrier_freq, btype='lowpass', fs=self.sample_rate)
-            modulated = lfilter(b, a, dsb_modulated).real
-
-        signal_power = np.mean(np.square(modulated))
+            # 双边带信号变换到频域，直接置零载波频率以上的上边带，保留下边带
+            # 一次 rfft + 一次 irfft 完成边带选择，无需希尔伯特变换与时域低通
+            # 实数 FFT 长度补零到 next_fast_len，避免长度含大质因子时退化为慢速 FFT
+            dsb_modulated = self.modulation_index * audio_wave * carrier
+            nfft = next_fast_len(length, real=True)
+            spectrum = rfft(dsb_modulated, n=nfft, axis=-1, workers=-1)
+            cutoff_bin = int(self.carrier_freq * nfft / self.sample_rate) + 1
+            spectrum[:, cutoff_bin:] = 0
+            modulated = irfft(spectrum, n=nfft, axis=-1, workers=-1)[:, :length]
+
+        # 噪声功率按声道各自的信号功率计算
+        signal_power = np.mean(np.square(modulated), axis=-1, keepdims=True)
         noise_power = signal_power / (10 ** (self.noise_snr / 10))  # SNR→噪声功率
-        noise = np.sqrt(noise_power) * np.random.randn(length)  # 高斯白噪声
+        noise = self._standard_noise(modulated.shape)  # 高斯白噪声
+        noise *= np.sqrt(noise_power)
         modulated += noise
 
         return modulated
 
     def _carrier_recovery(self, modulated_wave):
         """
-        载波恢复：平方律检波法
+        载波恢复：与标称频率的本地参考载波做互相关，按峰值位置估计相位
         """
-        squared = np.square(modulated_wave)
-
-        b, a = butter(2, [2 * self.carrier_freq - 100, 2 * self.carrier_freq + 100],
-                      btype='bandpass', fs=self.sample_rate)
-        filtered = lfilter(b, a, squared)
-
-        t = np.linspace(0, len(filtered) / self.sample_rate, len(filtered))
-        recovered_carrier = np.cos(np.cumsum(2 * np.pi * 2 * self.carrier_freq * t) * 0.5)
+        # 1. 本地参考载波 (标称载波频率，零相位)
+        length = modulated_wave.shape[-1]
+        reference = _cosine(self.carrier_freq, 0.0, length, self.sample_rate)
 
-        cross_corr = np.correlate(modulated_wave, recovered_carrier, mode='same')
-        phase_shift = np.argmax(cross_corr) * (2 * np.pi / len(cross_corr))
-        recovered_carrier = np.cos(2 * np.pi * self.carrier_freq * t + phase_shift)
+        # 2. 参考载波与声道无关，逐声道求互相关峰位置，得到 (通道数, 1) 的相位
+        # 互相关即与翻转参考的卷积，用 FFT 只沿时间轴计算 (O(N log N))，各声道的变换由多个线程并行完成
+        with scipy.fft.set_workers(-1):
+            cross_corr = fftconvolve(modulated_wave, reference[np.newaxis, ::-1], mode='same', axes=-1)
+        phase_shift = np.argmax(cross_corr, axis=-1)[:, np.newaxis] * (2 * np.pi / length)
+        recovered_carrier = _cosine(self.carrier_freq, phase_shift, length, self.sample_rate)
 
         return recovered_carrier
 
@@ -109,45 +148,43 @@ class EnhancedAMEffect(AudioEffect):
         """
         多模式AM解调：包络检波/同步检波（DSB-SC/SSB）
         """
+        # 解调低通 (截止频率=5kHz，覆盖音频最高频率) 与去加重 (补偿预加重，还原音频频响)
+        # 级联为同一组二阶节，一次 sosfilt 完成，信号只遍历一遍
+        sos = butter_sos(2, 5000, 'lowpass', self.sample_rate)
+        if self.pre_emphasis:
+            sos = np.vstack([sos, butter_sos(1, 3000, 'lowpass', self.sample_rate)])
+
         # 1. 标准AM：包络检波（结构简单，无需同步载波）
         if self.am_mode == "standard":
             rectified = np.abs(modulated_wave)  # 半波整流提取包络
-            # 低通滤波：提取包络（截止频率=5kHz，覆盖音频最高频率）
-            b, a = butter(2, 5000, btype='lowpass', fs=self.sample_rate)
-            demodulated = lfilter(b, a, rectified)
-            demodulated -= np.mean(demodulated)  # 去除直流分量
+            # 先去除直流分量：低通的直流增益为1，去均值可移到滤波之前，
+            # 避免滤波器从零状态爬升到直流电平时产生的起始瞬态
+            rectified -= np.mean(rectified, axis=-1, keepdims=True)
+            # 低通滤波：提取包络
+            demodulated = sosfilt_channels(sos, rectified)
 
         # 2. DSB-SC/SSB：同步检波（需先恢复载波）
         else:
             recovered_carrier = self._carrier_recovery(modulated_wave)
             multiplied = modulated_wave * recovered_carrier  # 相乘解调
             # 低通滤波提取低频调制分量
-            b, a = butter(2, 5000, btype='lowpass', fs=self.sample_rate)
-            demodulated = lfilter(b, a, multiplied)
-            demodulated = demodulated * 2 / self.modulation_index  # 幅度补偿
+            demodulated = sosfilt_channels(sos, multiplied)
+            demodulated *= 2 / self.modulation_index  # 幅度补偿
 
-        # 3. 去加重：补偿预加重，还原音频频响
-        if self.pre_emphasis:
-            b, a = butter(1, 3000, btype='lowpass', fs=self.sample_rate)
-            demodulated = lfilter(b, a, demodulated)
-
-        # 4. 归一化：避免幅度异常
-        demodulated = demodulated / np.max(np.abs(demodulated))
+        # 3. 逐声道归一化：避免幅度异常
+        demodulated = demodulated * (1.0 / channel_peaks(demodulated))
         return demodulated
 
     def process(self, audio, samplerate):
         self.sample_rate = samplerate  # 覆盖默认采样率
-        processed_wave = []
-
-        for chan in audio:
-            # 完整链路：预处理→调制→解调
-            preprocessed = self._preprocess_audio(chan)
-            modulated = self._am_modulate(preprocessed)
-            demodulated = self._am_demodulate(modulated)
-
-            processed_wave.append(demodulated)
-
-        return np.array(processed_wave)
+        # 音频源为16位精度，全链路使用 float32，内存带宽减半
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+
+        # 完整链路：预处理→调制→解调
+        # 所有声道组成 (通道数, 采样点数) 数组一起处理，滤波与 FFT 沿最后一维批量执行
+        preprocessed = self._preprocess_audio(audio)
+        modulated = self._am_modulate(preprocessed)
+        return self._am_demodulate(modulated)
 
     def get_params(self):
         """获取AM效果器参数（便于调试/参数调整）"""
@@ -1,6 +1,6 @@
 import numpy as np
-from scipy.signal import butter, lfilter, hilbert
 from .base import AudioEffect
+from ._utils import butter_sos, channel_peaks, sosfilt_channels
 
 class FSKEffect(AudioEffect):
     """
@@ -19,53 +19,79 @@ class FSKEffect(AudioEffect):
 
         # 2. 音频处理参数
         self.bit_depth = 16  # 音频量化比特深度（16bit，标准音频格式）
-        self.normalize = True  # 音频归一化（避免调制时幅度失真）
         self.noise_level = 0.001  # 模拟信道噪声强度（0~1）
 
+        # 3. 单比特载波表缓存：按 (每比特采样点数, 采样率, freq0, freq1) 复用
+        self._carrier_tables = {}
+
+        # 4. 信道噪声的随机数发生器
+        self._rng = np.random.default_rng()
+
     def _audio_to_bits(self, audio_wave, samplerate):
         """
         音频信号→数字比特流（数模转换核心步骤）
         知识点应用：抽样定理、量化编码、比特率匹配
+        audio_wave 形状为 (通道数, 采样点数)，所有声道一次完成分帧与判决
         """
         # 1. 音频归一化（避免幅度超界）
-        if self.normalize:
-            audio_wave = audio_wave / np.max(np.abs(audio_wave))
+        # 比特判决以各帧能量的均值为阈值，与整体幅度无关，
+        # 归一化不会改变判决结果，因此不再对整段音频做一次乘法
 
         # 2. 计算每个比特对应的采样点数（比特率→采样点映射）
         samples_per_bit = int(samplerate / self.bit_rate)
 
         # 3. 音频信号分帧（每帧对应1个比特）
-        # 补零使音频长度为samples_per_bit的整数倍
-        pad_len = (samples_per_bit - len(audio_wave) % samples_per_bit) % samples_per_bit
-        padded_wave = np.pad(audio_wave, (0, pad_len), mode='constant')
-
-        # 4. 帧能量量化为比特（能量>0为1，≤0为0，简化版编码）
-        frames = np.reshape(padded_wave, (-1, samples_per_bit))
-        frame_energy = np.mean(np.abs(frames), axis=1)  # 计算每帧能量
-        bits = (frame_energy > np.mean(frame_energy)).astype(int)  # 能量阈值分割为0/1
+        # 完整帧直接 reshape 为 (通道数, 比特数, samples_per_bit) 视图，不补零复制整段音频
+        num_chans, length = audio_wave.shape
+        num_full = length // samples_per_bit
+        num_bits = -(-length // samples_per_bit)
+        abs_wave = np.abs(audio_wave)
+        # 帧能量直接写入预分配的 (通道数, 比特数) 数组
+        frame_energy = np.empty((num_chans, num_bits), dtype=abs_wave.dtype)
+        abs_wave[:, :num_full * samples_per_bit].reshape(num_chans, num_full, samples_per_bit).mean(
+            axis=-1, out=frame_energy[:, :num_full])
+        # 尾部不足一帧时按补零处理：残余采样之和除以整帧长度
+        if num_bits > num_full:
+            frame_energy[:, -1] = abs_wave[:, num_full * samples_per_bit:].sum(axis=-1) / samples_per_bit
+
+        # 4. 帧能量量化为比特（能量>0为1，≤0为0，简化版编码），阈值按声道分别计算
+        bits = (frame_energy > frame_energy.mean(axis=-1, keepdims=True)).astype(np.int8)
 
         return bits, samples_per_bit
 
+    def _carrier_table(self, samples_per_bit, samplerate):
+        """
+        取 (必要时生成并缓存) 单比特时长的载波表，形状 (4, samples_per_bit)：
+        cos(freq0), cos(freq1), sin(freq0), sin(freq1)，每个比特的载波都从零相位开始
+        """
+        key = (samples_per_bit, samplerate, self.freq0, self.freq1)
+        table = self._carrier_tables.get(key)
+        if table is None:
+            t_bit = np.arange(samples_per_bit) / samplerate
+            phase = 2 * np.pi * np.array([[self.freq0], [self.freq1]]) * t_bit
+            table = np.concatenate([np.cos(phase), np.sin(phase)]).astype(np.float32)
+            table.setflags(write=False)
+            self._carrier_tables[key] = table
+        return table
+
     def _fsk_modulate(self, bits, samples_per_bit, samplerate):
         """
         FSK调制：数字比特流→FSK载波信号
         知识点应用：FSK调制公式 s(t) = A×cos(2πf_bit×t)
         """
-        # 1. 生成时间轴（每个比特对应的时间点）
-        t_bit = np.linspace(0, samples_per_bit / samplerate, samples_per_bit, endpoint=False)
+        # 1. 取单比特载波表（缓存，只在参数变化时重新生成）
+        carrier_table = self._carrier_table(samples_per_bit, samplerate)
 
         # 2. 生成FSK载波（逐比特拼接）
-        modulated = []
-        for bit in bits:
-            # 选择对应频率的载波：0→freq0，1→freq1
-            freq = self.freq0 if bit == 0 else self.freq1
-            # 生成单比特载波信号
-            bit_wave = np.cos(2 * np.pi * freq * t_bit)
-            modulated.extend(bit_wave)
-
-        # 3. 转换为numpy数组并添加信道噪声
-        modulated_wave = np.array(modulated)
-        noise = self.noise_level * np.random.randn(len(modulated_wave))  # 高斯白噪声
+        # 每个比特的载波都从零相位开始，只有两种波形：按比特值整行取出余弦行即得完整信号：0→freq0，1→freq1
+        # 取出的载波直接写入预分配的输出数组，(通道数, 比特数, samples_per_bit) 按行展开即为时域信号
+        num_chans, num_bits = bits.shape
+        modulated_wave = np.empty((num_chans, num_bits * samples_per_bit), dtype=carrier_table.dtype)
+        np.take(carrier_table, bits, axis=0, out=modulated_wave.reshape(num_chans, num_bits, samples_per_bit))
+
+        # 3. 添加信道噪声
+        noise = self._rng.standard_normal(modulated_wave.shape, dtype=np.float32)  # 高斯白噪声
+        noise *= self.noise_level
         modulated_wave += noise
 
         return modulated_wave
@@ -73,41 +99,34 @@ class FSKEffect(AudioEffect):
     def _fsk_demodulate(self, modulated_wave, samples_per_bit, samplerate):
         """
         FSK解调：FSK载波信号→数字比特流→还原音频
-        知识点应用：希尔伯特变换提取瞬时频率、比特判决、数模还原
+        知识点应用：I/Q 正交相关（非相干检测）、比特判决、数模还原
         """
-        # 1. 希尔伯特变换提取解析信号（用于计算瞬时频率）
-        analytic_signal = hilbert(modulated_wave)
-        instantaneous_phase = np.unwrap(np.angle(analytic_signal))
-        instantaneous_freq = np.diff(instantaneous_phase) / (2 * np.pi) * samplerate  # 瞬时频率
-
-        # 补零使瞬时频率长度与原信号一致
-        instantaneous_freq = np.pad(instantaneous_freq, (0, 1), mode='edge')
+        num_chans = modulated_wave.shape[0]
 
-        # 2. 分帧判决比特（每帧平均频率靠近freq0为0，靠近freq1为1）
-        frames = np.reshape(instantaneous_freq, (-1, samples_per_bit))
-        frame_freq = np.mean(frames, axis=1)
+        # 1. I/Q 正交参考：与调制端共用同一张载波表，两个载波各一组 cos/sin
+        references = self._carrier_table(samples_per_bit, samplerate)  # (4, samples_per_bit)
 
-        # 比特判决：计算与两个载波频率的距离
-        dist0 = np.abs(frame_freq - self.freq0)
-        dist1 = np.abs(frame_freq - self.freq1)
-        bits = (dist1 < dist0).astype(int)
+        # 2. 分帧积分判决比特：每帧与参考相关 (积分清零即匹配低通)，
+        #    I² + Q² 为该载波在本帧的能量，与相位无关；哪个载波能量大即判为哪个比特
+        #    一次矩阵乘法完成所有声道、所有帧的相关，无需希尔伯特变换与相位展开
+        frames = np.reshape(modulated_wave, (num_chans, -1, samples_per_bit))
+        iq = frames @ references.T  # (通道数, 比特数, 4)：I0, I1, Q0, Q1
+        energy = iq[..., :2] ** 2 + iq[..., 2:] ** 2
+        bits = (energy[..., 1] > energy[..., 0]).astype(int)
 
         # 3. 比特流→音频信号（简化版：1→正幅度，0→负幅度）
-        reconstructed = []
-        for bit in bits:
-            # 生成单比特对应的音频帧
-            bit_amp = 0.5 if bit == 1 else -0.5
-            bit_wave = np.full(samples_per_bit, bit_amp)
-            reconstructed.extend(bit_wave)
+        # 每个比特的幅度整帧重复，一次生成，不逐采样扩展 Python 列表
+        amplitudes = np.where(bits == 1, np.float32(0.5), np.float32(-0.5))
+        reconstructed = np.repeat(amplitudes, samples_per_bit, axis=-1)
 
         # 4. 低通滤波还原音频（滤除载波高频）
-        # 设计低通滤波器（截止频率=音频最高频率，此处取4kHz）
-        b, a = butter(2, 4000, btype='lowpass', fs=samplerate)
-        demodulated_wave = lfilter(b, a, np.array(reconstructed))
+        # 设计低通滤波器（截止频率=音频最高频率，此处取4kHz），以二阶节级联形式滤波
+        sos = butter_sos(2, 4000, 'lowpass', samplerate)
+        demodulated_wave = sosfilt_channels(sos, reconstructed)
 
-        # 5. 归一化并裁剪至原音频长度
-        demodulated_wave = demodulated_wave / np.max(np.abs(demodulated_wave))
-        demodulated_wave = demodulated_wave[:len(self._original_wave)]  # 匹配原音频长度
+        # 5. 逐声道归一化并裁剪至原音频长度
+        demodulated_wave = demodulated_wave * (1.0 / channel_peaks(demodulated_wave))
+        demodulated_wave = demodulated_wave[:, :self._original_wave.shape[-1]]  # 匹配原音频长度
 
         return demodulated_wave
 
@@ -119,23 +138,17 @@ class FSKEffect(AudioEffect):
         :param samplerate: 输入音频抽样率（Hz）
         :return: 处理后的音频波形，shape与输入一致
         """
-        processed_wave = []
-        self._original_wave = None  # 缓存原始波形（用于解调后长度匹配）
-
-        # 对每个声道单独处理
-        for chan in audio:
-            self._original_wave = chan  # 缓存当前声道波形
-            # 步骤1：音频→比特流
-            bits, samples_per_bit = self._audio_to_bits(chan, samplerate)
-            # 步骤2：比特流→FSK调制
-            modulated = self._fsk_modulate(bits, samples_per_bit, samplerate)
-            # 步骤3：FSK调制→还原音频
-            demodulated = self._fsk_demodulate(modulated, samples_per_bit, samplerate)
-
-            processed_wave.append(demodulated)
-
-        # 转换为numpy数组，保持与输入一致的格式
-        return np.array(processed_wave)
+        # 所有声道组成 (通道数, 采样点数) 数组一起处理，每个 scipy 调用只发起一次
+        # 音频源为16位精度，全链路使用 float32，内存带宽减半
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        self._original_wave = audio  # 缓存原始波形（用于解调后长度匹配）
+
+        # 步骤1：音频→比特流
+        bits, samples_per_bit = self._audio_to_bits(audio, samplerate)
+        # 步骤2：比特流→FSK调制
+        modulated = self._fsk_modulate(bits, samples_per_bit, samplerate)
+        # 步骤3：FSK调制→还原音频
+        return self._fsk_demodulate(modulated, samples_per_bit, samplerate)
 
     def get_params(self):
         """获取FSK效果器参数（便于调试/参数调整）"""
@@ -144,8 +157,7 @@ class FSKEffect(AudioEffect):
             "fsk_freq1(Hz)": self.freq1,
             "bit_rate(bps)": self.bit_rate,
             "bit_depth": self.bit_depth,
-            "noise_level": self.noise_level,
-            "normalize_audio": self.normalize
+            "noise_level": self.noise_level
         }
 
     def set_params(self, **kwargs):
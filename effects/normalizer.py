@@ -1,5 +1,6 @@
 import numpy as np
 from .base import AudioEffect
+from ._utils import peak_amplitude
 
 class Normalizer(AudioEffect):
     def __init__(self, target_db=-1.0):
@@ -7,7 +8,8 @@ class Normalizer(AudioEffect):
         self.target_factor = 10 ** (target_db / 20) # dB转线性幅度
 
     def process(self, audio, samplerate):
-        max_val = np.max(np.abs(audio))
+        max_val = peak_amplitude(audio)
         if max_val > 0:
-            return audio / max_val * self.target_factor
+            # 归一化与目标增益合并为一次乘法
+            return audio * (self.target_factor / max_val)
         return audio
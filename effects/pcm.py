@@ -7,13 +7,20 @@ class PCMBitcrusherStyle(AudioEffect):
     模拟降低比特深度带来的量化噪声。
     从 16bit/32bit 降低到 4bit 或 8bit 风格。
     """
+    is_streamable = True
+
     def __init__(self, bit_depth=4):
         super().__init__(f"PCM Quantization ({bit_depth}-bit)")
         self.quantization_levels = 2 ** bit_depth
 
     def process(self, audio, samplerate):
-        audio_normalized = (audio + 1.0) / 2.0
-        
-        audio_quantized = np.floor(audio_normalized * self.quantization_levels) / self.quantization_levels
-        
-        return audio_quantized * 2.0 - 1.0
+        # floor((x + 1) / 2 * L) / L * 2 - 1 展开为 floor(x * L/2 + L/2) * (2/L) - 1
+        # L 为 2 的幂，缩放不引入额外舍入，结果与逐步计算完全一致；
+        # 只分配一个 float32 输出数组，其余步骤都在其上原地完成
+        half_levels = self.quantization_levels / 2
+        out = np.multiply(audio, half_levels, dtype=np.float32)
+        out += half_levels
+        np.floor(out, out=out)
+        out *= 2.0 / self.quantization_levels
+        out -= 1.0
+        return out
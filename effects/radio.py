@@ -3,18 +3,29 @@ from pedalboard import Pedalboard, LowpassFilter, HighpassFilter, Distortion
 from .base import AudioEffect
 
 class RadioStyle(AudioEffect):
+    is_streamable = True
+
     def __init__(self, noise_level=0.015):
         super().__init__("AM Radio Style")
         self.noise_level = noise_level
+        self._rng = np.random.default_rng()
 
-    def process(self, audio, samplerate):
-        board = Pedalboard([
+        # 效果链参数固定，构造一次反复使用 (每次调用默认会重置插件内部状态)
+        self._board = Pedalboard([
             HighpassFilter(cutoff_frequency_hz=300),
             LowpassFilter(cutoff_frequency_hz=3400),
             Distortion(drive_db=10)
         ])
-        audio = board(audio, samplerate)
-        
-        # 加性高斯白噪声
-        noise = np.random.normal(0, self.noise_level, audio.shape)
-        return audio + noise
+
+    def plugins(self):
+        return list(self._board)
+
+    def process(self, audio, samplerate):
+        return self.finish(self._board(audio, samplerate), samplerate)
+
+    def finish(self, audio, samplerate):
+        # 加性高斯白噪声：在噪声数组上原地缩放并叠加信号，作为输出返回
+        out = self._rng.standard_normal(audio.shape, dtype=np.float32)
+        out *= self.noise_level
+        out += audio
+        return out
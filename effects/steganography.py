@@ -1,7 +1,40 @@
+import importlib.util
 import numpy as np
-from PIL import Image, ImageOps
-from scipy.signal import istft
+from scipy.fft import irfft
 from .base import AudioEffect
+from ._utils import NUMBA_AVAILABLE, fft_backend, njit, peak_amplitude, prange
+
+# CuPy 只在启用 GPU 时才导入 (导入会初始化 CUDA 运行时)，这里只检查是否安装；
+# 实际不可用时首次 GPU 调用失败会回退到 CPU 并把开关置为 False
+CUPY_AVAILABLE = importlib.util.find_spec('cupy') is not None
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, cache=True)
+    def _overlap_add(frames, hop, start, gain):
+        """
+        加窗帧 (T, n_fft) 的重叠相加，只输出 [start, start + gain.size) 区间，并乘以预先算好的归一化增益
+        按 hop 长的输出块并行：每块只汇总覆盖它的几帧，各线程写入互不重叠，
+        帧的累加顺序与逐帧相加相同，结果一致
+        """
+        num_frames, n_fft = frames.shape
+        length = gain.size
+        out = np.zeros(length, dtype=frames.dtype)
+        num_blocks = (length + hop - 1) // hop
+        for j in prange(num_blocks):
+            lo = j * hop
+            hi = min(lo + hop, length)
+            # 与本块相交的帧：t * hop < start + hi 且 t * hop + n_fft > start + lo
+            t_lo = max(0, (start + lo - n_fft) // hop + 1)
+            t_hi = min((start + hi - 1) // hop, num_frames - 1)
+            for t in range(t_lo, t_hi + 1):
+                offset = t * hop - start
+                for i in range(max(lo, offset), min(hi, offset + n_fft)):
+                    out[i] += frames[t, i - offset]
+            for i in range(lo, hi):
+                out[i] *= gain[i]
+        return out
 
 
 class SpectrogramArtStyle(AudioEffect):
@@ -11,31 +44,160 @@ class SpectrogramArtStyle(AudioEffect):
     图像的Y轴对应频率，X轴对应时间。
     """
 
-    def __init__(self, image_path, duration=5.0):
+    def __init__(self, image_path, duration=5.0, use_gpu=False):
         """
         :param image_path: 图片路径
         :param duration: 生成音频的目标时长 (秒)
+        :param use_gpu: 安装了 CuPy 时在 GPU 上构造频谱并做逆变换
         """
         super().__init__("Spectrogram Art Generator")
         self.image_path = image_path
         self.duration = duration
+        self.use_gpu = use_gpu
         # FFT窗口大小，决定了图片的高度分辨率
         self.n_fft = 2048
         # 步长，决定了横向时间分辨率
         self.hop_length = self.n_fft // 4
+        # 合成窗与重叠相加增益的缓存 (键, 值)，键与当前 n_fft / hop_length 不符时重建
+        self._window_cache = (None, None)
+        self._ola_cache = (None, None)
+        # 随机相位的随机数发生器
+        self._rng = np.random.default_rng()
+
+    def _synthesis_window(self):
+        """
+        取 (必要时重建) 合成窗及逐帧乘数，按 n_fft 缓存
+        合成窗为周期汉宁窗 (与 scipy.signal.istft 默认一致)，与频谱同为单精度，直接按定义计算，不为此导入 scipy.signal；
+        逐帧乘数为 'spectrum' 定标 (乘窗和) 与合成窗的合并
+        """
+        key, cached = self._window_cache
+        n_fft = self.n_fft
+        if key != n_fft:
+            window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+            cached = (window, window * window.sum())
+            self._window_cache = (n_fft, cached)
+        return cached
+
+    def _ola_gain(self, num_frames):
+        """
+        取 (必要时计算并缓存) 重叠相加的归一化增益：去掉两端延拓后，各采样处窗平方和的倒数
+        按 (n_fft, hop_length, 帧数) 缓存 (帧数由时长与采样率决定，通常固定)
+        窗平方和过小 (<= 1e-10) 处增益取1，与 scipy.signal.istft 的处理一致
+        """
+        n_fft, hop = self.n_fft, self.hop_length
+        key, gain = self._ola_cache
+        if key != (n_fft, hop, num_frames):
+            out_len = n_fft + (num_frames - 1) * hop
+            half = n_fft // 2
+            norm = np.zeros(out_len, dtype=np.float32)
+            window_sq = self._synthesis_window()[0] ** 2
+            for t in range(num_frames):
+                norm[t * hop:t * hop + n_fft] += window_sq
+            norm = norm[half:out_len - half]
+            gain = np.divide(1.0, norm, out=np.ones_like(norm), where=norm > 1e-10)
+            gain.setflags(write=False)
+            self._ola_cache = ((n_fft, hop, num_frames), gain)
+        return gain
+
+    def _istft(self, Zxx):
+        """
+        逆短时傅里叶变换：逐帧 irfft + 加窗重叠相加
+        与 scipy.signal.istft (hann 窗、boundary=True、scaling='spectrum') 结果一致，
+        但只对单边谱做实数逆变换，帧直接累加到预分配的输出上，不经过通用的轴变换与复数中间结果
+        """
+        n_fft, hop = self.n_fft, self.hop_length
+        num_frames = Zxx.shape[1]
+
+        # 1. 所有帧一次实数逆 FFT；转置为 (T, F) 使每帧在内存中连续 (列优先的频谱无需复制)，逆变换得到 (T, n_fft)
+        #    各帧的逆变换由多个线程并行完成 (有 pyFFTW 时使用 FFTW 后端)
+        #    'spectrum' 定标 (乘窗和) 与合成窗合并为一次乘法
+        spectra = np.ascontiguousarray(Zxx.T)
+        with fft_backend():
+            frames = irfft(spectra, n=n_fft, axis=-1, workers=-1, overwrite_x=True)
+        frames *= self._synthesis_window()[1]
+
+        # 2. 重叠相加，乘以缓存的归一化增益 (窗平方和的倒数)
+        #    两端各 n_fft//2 的延拓部分最终会被去掉
+        gain = self._ola_gain(num_frames)
+        half = n_fft // 2
+        if NUMBA_AVAILABLE:
+            return _overlap_add(frames, hop, half, gain)
+
+        out_len = n_fft + (num_frames - 1) * hop
+        out = np.zeros(out_len, dtype=frames.dtype)
+        for t in range(num_frames):
+            out[t * hop:t * hop + n_fft] += frames[t]
+
+        # 3. 去掉两端的延拓部分并归一化
+        out = out[half:out_len - half]
+        out *= gain
+        return out
+
+    def _synthesize_cpu(self, pixels):
+        """
+        CPU 路径：随机相位构造复数频谱，再逆变换为时域音频 (pixels 会被原地修改)
+        """
+        # 频谱按列优先 (Fortran 序) 存放，即 (T, F) 行连续，逆变换前的转置不再复制；
+        # 相位、幅度与频谱使用同一内存布局，逐元素运算都是连续访问
+        magnitude = np.asfortranarray(pixels)
+        magnitude *= magnitude
+
+        # 单精度随机相位直接生成；实部、虚部分别由 cos/sin 写入 complex64 频谱，不经过复指数
+        phase = self._rng.random(pixels.shape[::-1], dtype=np.float32).T
+        phase *= np.float32(2 * np.pi)
+
+        Zxx = np.empty(pixels.shape, dtype=np.complex64, order='F')
+        np.cos(phase, out=Zxx.real)
+        Zxx.real *= magnitude
+        np.sin(phase, out=phase)
+        np.multiply(phase, magnitude, out=Zxx.imag)
+        return self._istft(Zxx)
+
+    def _synthesize_gpu(self, pixels, samplerate):
+        """
+        GPU 路径：随机相位直接在显存中生成，频谱构造与 ISTFT 都在 GPU 上完成，只把结果拷回内存
+        """
+        import cupy as cp
+        import cupyx.scipy.signal as cp_signal
+
+        pixels = cp.asarray(pixels)
+        random_phase = cp.random.uniform(0, 2 * np.pi, pixels.shape, dtype=cp.float32)
+        Zxx = cp.exp(cp.complex64(1j) * random_phase)
+        Zxx *= pixels * pixels
+        _, out = cp_signal.istft(Zxx, fs=samplerate, window='hann', nperseg=self.n_fft,
+                                 noverlap=self.n_fft - self.hop_length, scaling='spectrum')
+        return cp.asnumpy(out)
+
+    def _try_synthesize_gpu(self, pixels, samplerate):
+        """
+        尝试 GPU 路径；CuPy 不可用 (子模块导入失败、无 CUDA 设备或驱动) 时返回 None 由调用方回退到 CPU，
+        并关闭模块级开关，之后的调用不再尝试 GPU
+        """
+        global CUPY_AVAILABLE
+        try:
+            return self._synthesize_gpu(pixels, samplerate)
+        except (ImportError, RuntimeError) as e:
+            # CuPy 的 CUDA 运行时/驱动错误均为 RuntimeError 的子类
+            print(f"   GPU 不可用，改用 CPU 计算: {e}")
+            CUPY_AVAILABLE = False
+            return None
 
     def process(self, audio, samplerate):
         print(f"[SpectrogramArt] 正在处理图片: {self.image_path}")
+        # 图像库只在本效果中使用，首次处理时再导入
+        from PIL import Image, ImageOps
 
         try:
             # 1. 读取图片并转为灰度图 (L模式)
             img = Image.open(self.image_path).convert('L')
 
             # === [核心修复] 自动反色检测 ===
-            # 逻辑：检查左上角第一个像素。如果是亮的(>128)，说明是白底图片。
+            # 逻辑：检查图片四条边框像素的中位数。如果是亮的(>128)，说明是白底图片。
             # 白底会导致全屏噪音，所以我们需要反转颜色，让背景变黑(静音)。
-            first_pixel = img.getpixel((0, 0))
-            if first_pixel > 128:
+            # 直接在 uint8 数组视图上统计，比只看左上角一个像素更可靠
+            arr = np.asarray(img)
+            border = np.concatenate([arr[0], arr[-1], arr[:, 0], arr[:, -1]])
+            if np.median(border) > 128:
                 print("   检测到白底图片，正在自动反色以优化听感...")
                 img = ImageOps.invert(img)
             # ==============================
@@ -48,26 +210,39 @@ class SpectrogramArtStyle(AudioEffect):
 
             # 3. 调整图片
             # 使用 BICUBIC 插值缩放，保证线条平滑
-            img = img.resize((target_width, target_height), Image.Resampling.BICUBIC)
+            # 大幅缩小 (任一方向超过2倍) 时改用 LANCZOS + reducing_gap：
+            # 先用 reduce() 做一次廉价的整数倍盒式降采样，再以 Lanczos 完成剩余缩放，更快且抗混叠更好
+            if max(img.width / target_width, img.height / target_height) > 2:
+                img = img.resize((target_width, target_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            else:
+                img = img.resize((target_width, target_height), Image.Resampling.BICUBIC)
             # 垂直翻转：因为频谱图低频在下，而图片坐标0在顶部
-            img = ImageOps.flip(img)
+            # 翻转与转置合并为一次旋转 (顺时针 90°)：得到 (时间, 频率) 排列的图像，
+            # 其数组转置即为翻转后的 (频率, 时间) 矩阵，且恰好是列优先布局
+            img = img.transpose(Image.Transpose.ROTATE_270)
 
             # 4. 转为数值矩阵并归一化
-            pixels = np.array(img) / 255.0
+            # 像素只有8位精度，全链路使用 float32/complex64，FFT 走单精度内核，内存减半
+            # np.asarray 直接取 PIL 图像的 uint8 数据；类型转换与缩放合并为一次 ufunc，
+            # 结果直接写入列优先 (与频谱相同布局) 的单精度缓冲区，按内存顺序连续访问
+            raw = np.asarray(img).T
+            pixels = np.empty(raw.shape, dtype=np.float32, order='F')
+            np.multiply(raw, np.float32(1.0 / 255.0), out=pixels)
 
-            # 5. 构造复数频谱 (STFT矩阵)
+            # 5. 构造复数频谱 (STFT矩阵) 并逆变换：频域 -> 时域 (ISTFT)
             # 使用随机相位 (Random Phase) 让图像成像更清晰
             # 对幅度做平方处理 (pixels**2) 增加对比度，让字更清楚，背景更黑
-            random_phase = np.random.uniform(0, 2 * np.pi, pixels.shape)
-            Zxx = (pixels ** 2) * np.exp(1j * random_phase)
-
-            # 6. 逆变换：频域 -> 时域 (ISTFT)
-            _, generated_audio = istft(Zxx, fs=samplerate, nperseg=self.n_fft, noverlap=self.n_fft - self.hop_length)
+            generated_audio = None
+            if self.use_gpu and CUPY_AVAILABLE:
+                generated_audio = self._try_synthesize_gpu(pixels, samplerate)
+            if generated_audio is None:
+                generated_audio = self._synthesize_cpu(pixels)
 
-            # 7. 最终幅度归一化 (防止爆音)
-            max_val = np.max(np.abs(generated_audio))
+            # 6. 最终幅度归一化 (防止爆音)
+            max_val = peak_amplitude(generated_audio)
             if max_val > 0:
-                generated_audio = generated_audio / max_val * 0.95
+                # 逆变换结果是本函数私有的新数组，原地缩放，不再分配输出
+                np.multiply(generated_audio, np.float32(0.95 / max_val), out=generated_audio)
 
             return generated_audio
 
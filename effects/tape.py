@@ -2,16 +2,23 @@ from pedalboard import Pedalboard, Chorus, Distortion, LowpassFilter, Compressor
 from .base import AudioEffect
 
 class TapeStyle(AudioEffect):
+    is_streamable = True
+
     def __init__(self, flutter=0.15, drive=3):
         super().__init__("Vintage Tape Style")
         self.flutter = flutter
         self.drive = drive
 
-    def process(self, audio, samplerate):
-        board = Pedalboard([
+        # 效果链参数固定，构造一次反复使用 (每次调用默认会重置插件内部状态)
+        self._board = Pedalboard([
             Compressor(threshold_db=-10, ratio=2.5),
             Chorus(rate_hz=1.5, depth=self.flutter, mix=0.5),
             Distortion(drive_db=self.drive),
             LowpassFilter(cutoff_frequency_hz=12000),
         ])
-        return board(audio, samplerate)
+
+    def plugins(self):
+        return list(self._board)
+
+    def process(self, audio, samplerate):
+        return self._board(audio, samplerate)
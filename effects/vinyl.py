@@ -1,6 +1,7 @@
 import numpy as np
 from pedalboard import Pedalboard, LowpassFilter, HighpassFilter, Gain, Chorus, Distortion, PeakFilter
 from .base import AudioEffect
+from ._utils import peak_amplitude
 
 class VinylStyle(AudioEffect):
     def __init__(self, crackle_amount=0.0005, hiss_level=0.002, wow_amount=0.1):
@@ -8,18 +9,26 @@ class VinylStyle(AudioEffect):
         self.crackle_amount = crackle_amount
         self.hiss_level = hiss_level  # 持续的底噪大小
         self.wow_amount = wow_amount  # 唱片转速不稳的程度 (0.0 - 1.0)
+        # 底噪与爆豆共用的随机数发生器
+        self._rng = np.random.default_rng()
+
+        # 效果链参数固定，构造一次反复使用 (每次调用默认会重置插件内部状态)
+        self._board = Pedalboard(self._build_plugins())
 
     def generate_colored_noise(self, shape, color='pink'):
         """生成有色噪声模拟唱片底噪 (简化版)"""
-        noise = np.random.normal(0, 1, shape)
+        # 音频为 float32，噪声直接以单精度生成，后续滤波与混合都保持单精度
+        noise = self._rng.standard_normal(shape, dtype=np.float32)
         if color == 'pink' or color == 'brown':
-            # 简单的累积求和模拟布朗噪声，比白噪声听起来更像低频轰隆声
-            noise = np.cumsum(noise, axis=0) 
+            from scipy.signal import lfilter
+            # 沿时间轴做漏积分 y[n] = 0.995·y[n-1] + x[n] 模拟布朗噪声，比白噪声听起来更像低频轰隆声
+            # 与直接累积求和相比没有随机游走的漂移，一阶 IIR 单遍完成
+            noise = lfilter(np.float32([1.0]), np.float32([1.0, -0.995]), noise, axis=-1)
             # 归一化防止溢出
-            noise = noise / (np.max(np.abs(noise)) + 1e-9)
+            noise *= 1.0 / (peak_amplitude(noise) + 1e-9)
         return noise
 
-    def process(self, audio, samplerate):
+    def _build_plugins(self):
         # 1. 模拟物理缺陷：抖动
         # 使用 Mix=1.0 的 Chorus 效果来模拟音高微小的波动
         # 这种波动模仿了唱片不平整或转速微小变化带来的“晃动感”
@@ -47,26 +56,40 @@ class VinylStyle(AudioEffect):
             LowpassFilter(cutoff_frequency_hz=12000), 
         ])
 
+        return [wow_effect, *analog_chain]
+
+    def plugins(self):
+        return list(self._board)
+
+    def process(self, audio, samplerate):
         # 应用效果链
-        board = Pedalboard([wow_effect, *analog_chain])
-        audio_processed = board(audio, samplerate)
+        audio_processed = self._board(audio, samplerate)
+        return self.finish(audio_processed, samplerate)
 
+    def finish(self, audio_processed, samplerate):
         # 3. 模拟物理噪声层
         
         # 3.1 持续底噪
         # 生成稍微偏低频的噪声，而非刺耳的白噪声
-        noise_floor = self.generate_colored_noise(audio.shape, color='brown') * self.hiss_level
+        noise_floor = self.generate_colored_noise(audio_processed.shape, color='brown')
+        noise_floor *= self.hiss_level
         
         # 3.2 爆豆/划痕 
         # 保持你的 Numpy 逻辑，但稍微稀疏一点，因为真实的爆豆不是持续的
-        crackle = np.zeros_like(audio)
-        indices = np.random.rand(*audio.shape) < self.crackle_amount
+        # 每个采样以 crackle_amount 的概率出现爆豆：先按二项分布抽出爆豆总数 (一次标量抽样)，
+        # 再不放回地均匀抽取这些位置，与逐采样掩码的分布完全相同，
+        # 但不生成整段音频大小的随机数组与掩码，也不需要对掩码计数
+        num_crackles = self._rng.binomial(audio_processed.size, self.crackle_amount)
         # 爆豆通常只有一边声道或者两边不对称
-        crackle[indices] = np.random.uniform(-0.15, 0.15, np.sum(indices))
+        # 下标排序后写入时按内存顺序访问
+        crackle_idx = np.sort(self._rng.choice(audio_processed.size, size=num_crackles, replace=False))
+        crackle_amp = self._rng.uniform(-0.15, 0.15, num_crackles).astype(np.float32)
         
         # 混合所有信号
-        # 原始音频经过处理 + 底噪 + 爆豆
-        final_audio = audio_processed + noise_floor + crackle
+        # 原始音频经过处理 + 底噪 + 爆豆：处理结果原地累加到底噪数组上，
+        # 爆豆下标互不重复，直接以花式索引在其位置稀疏累加
+        final_audio = noise_floor
+        final_audio += audio_processed
+        final_audio.reshape(-1)[crackle_idx] += crackle_amp
         
         return final_audio
-    
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import glob
+import numpy as np
 from audio_loader import AudioHandler
 from audio_exporter import AudioExporter
 from pipeline import AudioPipeline
@@ -22,7 +23,6 @@ from effects.channel_code import HammingCodeEffect, CRC32Effect, CombinedChannel
 
 # 导入可视化分析工具
 from analysis import AudioAnalyzer
-from pedalboard.io import AudioFile
 
 
 def cleanup_directories():
@@ -55,9 +55,10 @@ def main():
         from pydub import AudioSegment
         AudioSegment.silent(duration=3000).export(input_file, format="mp3")
 
-    # Step 1: 转 Wav
-    wav_path = loader.convert_mp3_to_wav(input_file)
-    output_wav = wav_path.replace(".wav", "_final.wav")
+    # Step 1: 解码 MP3 (直接进内存，不再落盘中间 WAV)
+    original_audio, sr = loader.load_mp3(input_file)
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    output_wav = str((loader.temp_dir / f"{stem}_final.wav").absolute())
 
     clean_chain = []  # 预处理链(留空)
 
@@ -117,21 +118,19 @@ def main():
 
     # 执行处理
     print(f"运行链路: {experiment_name}")
-    pipeline.run(
-        input_path=wav_path,
-        output_path=output_wav,
+    processed_audio = pipeline.process(
+        original_audio, sr,
         pre_processors=clean_chain,
         main_effects=style_chain
     )
+    pipeline.save(processed_audio, sr, output_wav)
+    print(f"完成: {output_wav}")
 
     # 可视化分析
     print("\n--- 正在进行信号分析 ---")
     try:
-        with AudioFile(wav_path) as f:
-            original_data = f.read(f.frames)[0]
-            sr = f.samplerate
-        with AudioFile(output_wav) as f:
-            processed_data = f.read(f.frames)[0]
+        original_data = np.atleast_2d(original_audio)[0]
+        processed_data = np.atleast_2d(processed_audio)[0]
 
         snr = AudioAnalyzer.calculate_snr(original_data, processed_data)
         print(f"信噪比 (SNR): {snr:.2f} dB")
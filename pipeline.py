@@ -1,31 +1,70 @@
+from pedalboard import Pedalboard
 from pedalboard.io import AudioFile
 import numpy as np
+from effects.base import AudioEffect
 
 class AudioPipeline:
-    def run(self, input_path, output_path, pre_processors=None, main_effects=None):
+    # 流式处理时每次读入的帧数
+    block_size = 65536
+
+    def process(self, audio, samplerate, pre_processors=None, main_effects=None):
+        """在内存中依次执行预处理与主效果，返回处理后的音频"""
         if pre_processors is None: pre_processors = []
         if main_effects is None: main_effects = []
 
-        print(f"开始处理: {input_path}")
+        self._announce(pre_processors, main_effects)
+        stages = self._build_stages([*pre_processors, *main_effects])
+        return self._run_stages(stages, audio, samplerate)
 
-        # 1. 读入
-        with AudioFile(input_path) as f:
-            audio = f.read(f.frames)
-            samplerate = f.samplerate
-
-        # 2. 预处理
+    @staticmethod
+    def _announce(pre_processors, main_effects):
+        """按执行顺序打印效果名称"""
         pass_count = 1
-        for effect in pre_processors:
-            print(f"   [{pass_count}] 预处理: {effect.name}")
-            audio = effect.process(audio, samplerate)
-            pass_count += 1
+        for label, effects in (("预处理", pre_processors), ("风格化", main_effects)):
+            for effect in effects:
+                print(f"   [{pass_count}] {label}: {effect.name}")
+                pass_count += 1
+
+    @staticmethod
+    def _build_stages(effects):
+        """
+        把效果列表整理为执行阶段 (Pedalboard 插件链或效果的处理方法)
+        相邻的 Pedalboard 效果 (plugins() 返回插件列表) 合并为一条效果链，音频只遍历一遍
+        插件链之后还有其他处理 (重写了 finish) 的效果会结束当前合并链
+        """
+        stages = []
+        chain = []
+        for effect in effects:
+            plugins = effect.plugins()
+            if plugins is None:
+                if chain:
+                    stages.append(Pedalboard(chain))
+                    chain = []
+                stages.append(effect.process)
+                continue
+
+            chain.extend(plugins)
+            if type(effect).finish is not AudioEffect.finish:
+                stages.append(Pedalboard(chain))
+                chain = []
+                stages.append(effect.finish)
 
-        # 3. 主效果
-        for effect in main_effects:
-            print(f"   [{pass_count}] 风格化: {effect.name}")
-            audio = effect.process(audio, samplerate)
-            pass_count += 1
+        if chain:
+            stages.append(Pedalboard(chain))
+        return stages
 
+    @staticmethod
+    def _run_stages(stages, audio, samplerate, reset=True):
+        """依次执行各阶段；reset=False 时插件链保留上一块结束时的内部状态 (流式处理)"""
+        for stage in stages:
+            if isinstance(stage, Pedalboard):
+                audio = stage(audio, samplerate, reset=reset)
+            else:
+                audio = stage(audio, samplerate)
+        return audio
+
+    def save(self, audio, samplerate, output_path):
+        """将音频数组写入文件"""
         if len(audio.shape) > 1:
             num_channels = audio.shape[0]
         else:
@@ -33,6 +72,43 @@ class AudioPipeline:
 
         with AudioFile(output_path, 'w', samplerate, num_channels) as f:
             f.write(audio)
-        # ----------------------------------------------------
 
-        print(f"完成: {output_path}")
\ No newline at end of file
+    def run(self, input_path, output_path, pre_processors=None, main_effects=None):
+        print(f"开始处理: {input_path}")
+        if pre_processors is None: pre_processors = []
+        if main_effects is None: main_effects = []
+
+        # 所有效果都支持分块处理时，边读边处理边写，内存占用与文件长度无关
+        if all(effect.is_streamable for effect in [*pre_processors, *main_effects]):
+            self._run_streaming(input_path, output_path, pre_processors, main_effects)
+            print(f"完成: {output_path}")
+            return
+
+        # 1. 读入
+        with AudioFile(input_path) as f:
+            audio = f.read(f.frames)
+            samplerate = f.samplerate
+
+        # 2. 处理
+        audio = self.process(audio, samplerate, pre_processors, main_effects)
+
+        # 3. 写出
+        self.save(audio, samplerate, output_path)
+
+        print(f"完成: {output_path}")
+
+    def _run_streaming(self, input_path, output_path, pre_processors, main_effects):
+        """分块读入 → 处理 → 写出；插件链在块之间保留内部状态，与整段处理衔接一致"""
+        self._announce(pre_processors, main_effects)
+        stages = self._build_stages([*pre_processors, *main_effects])
+        for stage in stages:
+            if isinstance(stage, Pedalboard):
+                stage.reset()
+
+        with AudioFile(input_path) as f, \
+                AudioFile(output_path, 'w', f.samplerate, f.num_channels) as out:
+            while True:
+                block = f.read(self.block_size)
+                if block.shape[-1] == 0:
+                    break
+                out.write(self._run_stages(stages, block, f.samplerate, reset=False))